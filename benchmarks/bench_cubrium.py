@@ -0,0 +1,142 @@
+import sys
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+import pytest
+
+import cubrium
+
+
+materials = {
+    "svk": (0, [1.0, 50.0]),
+    "ksvk": (1, [1.0, 50.0, 2]),
+    "ksvk_multi": (2, [[1.0, 50.0, 2], [0.5, 3.0, -1]]),
+    "tod": (3, [0.4, 0.1, 0.02, -0.01, 0.01, 50.0]),
+    "nh_compr": (4, [1.0, 50.0]),
+}
+
+loadcases = [
+    "uniaxial",
+    "biaxial",
+    "planarshear",
+    "simpleshear",
+    "simpleshearfree3",
+    "simpleshearfree2free3",
+]
+
+backends = ["numpy", "numba"]
+
+options = dict(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=20, verbose=False)
+
+
+def model(material, loadcase, backend="numpy"):
+    if backend == "numba":
+        pytest.importorskip("numba")
+    matid, parameters = materials[material]
+    MDL = cubrium.init(backend=backend)
+    MDL.GLO.constitution.matid = matid
+    MDL.GLO.constitution.parameters = parameters
+    return cubrium.update(getattr(cubrium.loadcase, loadcase)(MDL))
+
+
+def path(MDL):
+    "Extended unknowns of all converged steps."
+    return np.array([res.x for res in cubrium.solve(MDL)(**options)])
+
+
+def states(n):
+    "Random displacement gradients and load-proportionality-factors."
+    rng = np.random.default_rng(3)
+    return 0.05 * rng.standard_normal((n, 9)), np.linspace(0, 1, n)
+
+
+def throughput(benchmark, name, n):
+    "Store the number of items per second (if the benchmark is enabled)."
+    if benchmark.stats:
+        benchmark.extra_info[name] = n / benchmark.stats.stats.mean
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("loadcase", loadcases)
+@pytest.mark.parametrize("material", materials)
+def bench_residuals(benchmark, material, loadcase, backend):
+    MDL = model(material, loadcase, backend)
+    H, lpf = states(1)
+    cubrium.assembly.equilibrium(H[0], lpf[0], MDL)
+
+    benchmark(cubrium.assembly.equilibrium, H[0], lpf[0], MDL)
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("loadcase", loadcases)
+@pytest.mark.parametrize("material", materials)
+def bench_residuals_batch(benchmark, material, loadcase, backend):
+    MDL = model(material, loadcase, backend)
+    H, lpf = states(1000)
+    cubrium.assembly.equilibrium(H, lpf, MDL)
+
+    benchmark(cubrium.assembly.equilibrium, H, lpf, MDL)
+    throughput(benchmark, "evaluations/s", len(H))
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("loadcase", loadcases)
+@pytest.mark.parametrize("material", materials)
+def bench_solve(benchmark, material, loadcase, backend):
+    MDL = model(material, loadcase, backend)
+
+    # iterations and peak memory of an untimed run
+    tracemalloc.start()
+    with cubrium.instrument.profile(MDL) as report:
+        Res = cubrium.solve(MDL)(**options)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    benchmark.pedantic(cubrium.solve(MDL), kwargs=options, rounds=3)
+
+    benchmark.extra_info["steps"] = len(Res) - 1
+    benchmark.extra_info["newton iterations"] = report.iterations
+    benchmark.extra_info["rejections"] = report.rejections
+    benchmark.extra_info["residual evaluations"] = report.calls["assembly.equilibrium"]
+    benchmark.extra_info["jacobian evaluations"] = report.calls["assembly.jacobian"]
+    benchmark.extra_info["peak memory (MiB)"] = peak / 2 ** 20
+
+
+@pytest.mark.parametrize("loadcase", ["uniaxial", "biaxial", "planarshear"])
+@pytest.mark.parametrize("material", materials)
+def bench_prescribed(benchmark, material, loadcase):
+    MDL = model(material, loadcase)
+    x = np.linspace(0.01, 0.2, 50)
+
+    benchmark(cubrium.prescribed, MDL, x)
+    throughput(benchmark, "states/s", len(x))
+
+
+@pytest.mark.parametrize("loadcase", loadcases)
+@pytest.mark.parametrize("material", materials)
+def bench_recover(benchmark, material, loadcase):
+    MDL = model(material, loadcase)
+    Y = np.tile(path(MDL), (50, 1))
+
+    benchmark(cubrium.recover, Y, MDL, columnar=True)
+    throughput(benchmark, "steps/s", len(Y))
+
+
+@pytest.mark.parametrize("writer", ["xdmf", "hdf5"])
+def bench_writer(benchmark, writer, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    MDL = model("svk", "uniaxial")
+    Y = np.tile(path(MDL), (50, 1))
+    history = cubrium.recover(Y, MDL, columnar=True)
+
+    write = getattr(cubrium.writer, writer)
+    benchmark.pedantic(write, args=(history, writer), rounds=3)
+    throughput(benchmark, "steps/s", len(Y))
+
+
+def bench_import(benchmark):
+    benchmark.pedantic(
+        subprocess.run, args=([sys.executable, "-c", "import cubrium"],), rounds=10
+    )
@@ -1,20 +1,53 @@
 from .__about__ import __version__
 
+import importlib
+
 from . import assembly
 from . import constitution
 from . import helpers
+from . import hyperdual
+from . import instrument
 from . import kinematics
 from . import kinetics
 from . import loadcase
+from . import solver
 from . import system
-from . import writer
 
 from .system import init
 from .system import update
+from .system import freeze
 
 from .assembly import recover
 
 from .solver import solve
+from .solver import prescribed
+
+# modules with heavy dependencies (numba, meshio, h5py, multiprocessing) and
+# their functions are imported on first access
+_modules = [
+    "aio",
+    "cli",
+    "fit",
+    "jit",
+    "parallel",
+    "results",
+    "writer",
+]
+_functions = {"sweep": "parallel", "lockstep": "parallel"}
+
+
+def __getattr__(name):
+    if name in _modules:
+        return importlib.import_module("." + name, __name__)
+    if name in _functions:
+        value = getattr(importlib.import_module("." + _functions[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + _modules + list(_functions))
 
 
 __all__ = [
@@ -0,0 +1,79 @@
+import atexit
+import asyncio
+import functools
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+from . import assembly
+from . import solver
+
+
+class Cancelled(Exception):
+    "The continuation was cancelled between two steps."
+
+
+async def solve(MDL, executor=None, engine="native", **kwargs):
+    """Asynchronous variant of `solve(MDL, engine)(**kwargs)`. The
+    continuation runs in an `executor` (a thread or process pool, by default
+    the executor of the event loop), which also bounds the number of
+    concurrent solves: further requests wait in its queue.
+
+    If the awaiting task is cancelled, a queued solve is not started and a
+    running continuation of the native engine stops after the current step
+    (a `checkpoint` is saved). With a process pool, the model must be
+    picklable and a `callback` is called in the worker process."""
+
+    loop = asyncio.get_running_loop()
+    cancel = _event(executor)
+
+    try:
+        return await loop.run_in_executor(
+            executor, functools.partial(_solve, MDL, engine, cancel, kwargs)
+        )
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+
+
+async def recover(Y, MDL, columnar=False, executor=None):
+    "Asynchronous variant of `recover(Y, MDL, columnar)` (see `solve`)."
+
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(
+        executor, functools.partial(assembly.recover, Y, MDL, columnar)
+    )
+
+
+def _solve(MDL, engine, cancel, kwargs):
+    "Solve a model and stop the native continuation if `cancel` is set."
+
+    callback = kwargs.get("callback")
+
+    def check(res):
+        if callback is not None:
+            callback(res)
+        if cancel.is_set():
+            raise Cancelled()
+
+    if engine == "native":
+        kwargs = dict(kwargs, callback=check)
+
+    return solver.solve(MDL, engine)(**kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def _manager():
+    """Shared manager for cancellation flags of solves in worker processes.
+    It is started on first use and its server process is shut down at exit."""
+    manager = mp.Manager()
+    atexit.register(manager.shutdown)
+    return manager
+
+
+def _event(executor):
+    "Cancellation flag which is shared with the worker of an executor."
+    if isinstance(executor, ProcessPoolExecutor):
+        return _manager().Event()
+    return threading.Event()
@@ -6,87 +6,271 @@ Created on Fri Feb 12 08:39:06 2021
 """
 
 import numpy as np
-from functools import partial
-
-from copy import deepcopy as copy
+from types import SimpleNamespace
 
+from . import constitution
+from . import instrument
 from . import kinematics
 from . import kinetics
 
 
-def recover(Y, MDL):
-    "Recover equilibrium of multiple solutions."
-    return [copy(system(y[:-1], y[-1], MDL)[1]) for y in Y]
+@instrument.timed
+def recover(Y, MDL, columnar=False):
+    """Recover equilibrium of multiple solutions. Returns a list of states
+    (see `system`), one per solution, or a columnar history with contiguous
+    arrays of all internal quantities which are evaluated in one batched
+    pass (umats which are not vectorized are called once per step)."""
+
+    if not columnar:
+        return [system(y[:-1], y[-1], MDL)[1] for y in Y]
+
+    Y = np.asarray(Y)
+    F = kinematics.defgrd(Y[:, :-1])
+    umat = instrument.umat(constitution.vectorize(MDL.GLO.constitution.umat))
+    P = umat(F, MDL.GLO.constitution.parameters)
+
+    history = internal(F, P, MDL)
+    history.H = Y[:, :-1]
+    history.lpf = Y[:, -1]
+    history.GLO = MDL.GLO
 
+    return history
+
+
+def stack(history):
+    "Convert a list of recovered models to a columnar history."
+
+    columns = SimpleNamespace(
+        force=SimpleNamespace(),
+        traction=SimpleNamespace(),
+        gridvec=SimpleNamespace(),
+    )
 
+    for group in ["force", "traction"]:
+        for item in ["components", "normal", "shear"]:
+            setattr(
+                getattr(columns, group),
+                item,
+                np.array([getattr(getattr(h.INT, group), item) for h in history]),
+            )
+
+    for item in ["length", "components", "volumeratio"]:
+        setattr(
+            columns.gridvec,
+            item,
+            np.array([getattr(h.INT.gridvec, item) for h in history]),
+        )
+
+    columns.cauchy = np.array([h.INT.cauchy for h in history])
+    columns.H = (columns.gridvec.components - np.eye(3)).reshape(-1, 9)
+    columns.lpf = np.array([h.EXT.lpf for h in history])
+    columns.GLO = history[0].GLO
+
+    return columns
+
+
+@instrument.timed
 def equilibrium(H, lpf, MDL):
-    "System equilibrium function returning only residuals."
-    return system(H, lpf, MDL)[0]
+    """System equilibrium function returning only residuals. The umat is
+    evaluated once and only those internal quantities which are selected by
+    the DOFs are calculated (internal quantities of the model are not
+    updated, use `system` or `recover` instead). Compiled kernels are used
+    if the model has a residual plan (see `jit.plan`)."""
+
+    if MDL.GLO.kernel is not None:
+        from . import jit
+
+        return jit.equilibrium(H, lpf, MDL)
+
+    F = kinematics.defgrd(H)
+    umat = instrument.umat(constitution.vectorize(MDL.GLO.constitution.umat))
+    P = umat(F, MDL.GLO.constitution.parameters)
+
+    INT = SimpleNamespace()
+
+    if MDL.GLO.plan.force:
+        INT.force = SimpleNamespace()
+        (
+            INT.force.components,
+            INT.force.normal,
+            INT.force.shear,
+        ) = kinetics.force(P, MDL.GLO.cube.edges, MDL.GLO.cube.areas)
+
+    if MDL.GLO.plan.traction:
+        INT.traction = SimpleNamespace()
+        (
+            INT.traction.components,
+            INT.traction.normal,
+            INT.traction.shear,
+        ) = kinetics.traction(P, MDL.GLO.cube.edges, MDL.GLO.cube.areas)
+
+    if MDL.GLO.plan.gridvec:
+        INT.gridvec = SimpleNamespace()
+        INT.gridvec.length, INT.gridvec.components = kinematics.gridvecns(F)
+
+    return residuals(INT, lpf, MDL)
+
+
+@instrument.timed
+def jacobian(H, lpf, MDL):
+    """Jacobian of the system equilibrium equations w.r.t. the displacement
+    gradient (requires a umat which supports `tangent=True`)."""
+
+    F = kinematics.defgrd(H)
+
+    umat = instrument.umat(constitution.vectorize(MDL.GLO.constitution.umat))
+    P, A = umat(F, MDL.GLO.constitution.parameters, tangent=True)
+    dFn, dFc = kinematics.gridvecns_tangent(F)
+
+    # dF/dH is the identity for the flattened displacement gradient
+    return derivative(A, dFn, dFc, MDL)
+
 
+@instrument.timed
+def jacobian_lpf(H, lpf, MDL):
+    """Jacobian of the system equilibrium equations w.r.t. the
+    load-proportionality-factor."""
 
+    return MDL.GLO.plan.scaled * np.ones(np.shape(lpf) + (1,))
+
+
+def derivative(A, dFn, dFc, MDL):
+    """Assemble the derivatives of the residuals for given derivatives of
+    (stacks of) the First Piola-Kirchhoff stress tensor and the normal and
+    shear components of the gridvectors. The variables of the derivatives
+    are stored in the last two axes (they are flattened in the result)."""
+
+    plan = MDL.GLO.plan
+    dq = {}
+
+    if plan.force:
+        dq[0], dq[3] = kinetics.force_tangent(A, MDL.GLO.cube.edges, MDL.GLO.cube.areas)
+
+    if plan.traction:
+        dq[12], dq[15] = kinetics.traction_tangent(
+            A, MDL.GLO.cube.edges, MDL.GLO.cube.areas
+        )
+
+    if plan.gridvec:
+        dq[24], dq[27] = dFn, dFc
+
+    if 36 in plan.items:
+        dq[36] = (
+            dFc[..., [0, 1, 2], [1, 2, 0], :, :] - dFc[..., [1, 2, 0], [0, 1, 2], :, :]
+        )
+
+    jac = -_gather(dq, plan, ndim=2)
+
+    return jac.reshape(*jac.shape[:-2], -1)
+
+
+@instrument.timed
 def system(H, lpf, MDL):
-    "Assemble system equilibrium equations."
+    """Assemble system equilibrium equations and evaluate all internal
+    quantities. The model is not modified, the residuals are returned with a
+    new state of the internal (INT) and external quantities (EXT, with the
+    lpf) which refers to the global namespace (GLO) of the model."""
 
     # H, lpf = y[:-1], y[-1]
     F = kinematics.defgrd(H)
+    umat = instrument.umat(constitution.vectorize(MDL.GLO.constitution.umat))
+    P = umat(F, MDL.GLO.constitution.parameters)
+
+    state = SimpleNamespace(GLO=MDL.GLO, EXT=SimpleNamespace(**vars(MDL.EXT)))
+    state.EXT.lpf = lpf
+    state.INT = internal(F, P, MDL)
+
+    return residuals(state.INT, lpf, MDL), state
+
+
+def internal(F, P, MDL, INT=None):
+    """Evaluate all internal quantities for given (stacks of) deformation
+    gradients and First Piola-Kirchhoff stress tensors. The quantities are
+    stored in the namespace INT (a new one is created by default)."""
 
-    Lpf = np.ones(6)
-    Lpf[MDL.GLO.lpftype] = lpf
-    MDL.EXT.lpf = lpf
+    if INT is None:
+        INT = SimpleNamespace(
+            force=SimpleNamespace(),
+            traction=SimpleNamespace(),
+            gridvec=SimpleNamespace(),
+        )
 
-    P = partial(MDL.GLO.constitution.umat, parameters=MDL.GLO.constitution.parameters)
     (
-        MDL.INT.force.components,
-        MDL.INT.force.normal,
-        MDL.INT.force.shear,
-    ) = kinetics.force(F, P, MDL.GLO.cube.edges, MDL.GLO.cube.areas)
+        INT.force.components,
+        INT.force.normal,
+        INT.force.shear,
+    ) = kinetics.force(P, MDL.GLO.cube.edges, MDL.GLO.cube.areas)
 
     (
-        MDL.INT.traction.components,
-        MDL.INT.traction.normal,
-        MDL.INT.traction.shear,
-    ) = kinetics.traction(F, P, MDL.GLO.cube.edges, MDL.GLO.cube.areas)
+        INT.traction.components,
+        INT.traction.normal,
+        INT.traction.shear,
+    ) = kinetics.traction(P, MDL.GLO.cube.edges, MDL.GLO.cube.areas)
 
-    MDL.INT.gridvec.length, MDL.INT.gridvec.components = kinematics.gridvecns(F)
-    MDL.INT.gridvec.volumeratio = np.linalg.det(MDL.INT.gridvec.components)
+    INT.gridvec.length, INT.gridvec.components = kinematics.gridvecns(F)
+    INT.gridvec.volumeratio = np.linalg.det(INT.gridvec.components)
 
-    MDL.INT.cauchy = kinetics.cauchy(F, P)
+    INT.cauchy = kinetics.cauchy(F, P)
 
-    res_fn = (
-        -MDL.INT.force.normal[MDL.GLO.dof.force.normal]
-        + MDL.EXT.force.normal[MDL.GLO.dof.force.normal] * Lpf[0]
-    )
+    return INT
 
-    res_fs = (
-        -MDL.INT.force.shear[MDL.GLO.dof.force.shear]
-        + MDL.EXT.force.shear[MDL.GLO.dof.force.shear] * Lpf[1]
-    )
 
-    res_tn = (
-        -MDL.INT.traction.normal[MDL.GLO.dof.traction.normal]
-        + MDL.EXT.traction.normal[MDL.GLO.dof.traction.normal] * Lpf[2]
-    )
+def residuals(INT, lpf, MDL):
+    """Assemble the residuals of the system equilibrium equations for given
+    internal quantities with the residual plan of the model (see
+    `system.plan`). Groups of internal quantities without selected DOFs are
+    skipped."""
 
-    res_ts = (
-        -MDL.INT.traction.shear[MDL.GLO.dof.traction.shear]
-        + MDL.EXT.traction.shear[MDL.GLO.dof.traction.shear] * Lpf[3]
-    )
+    plan = MDL.GLO.plan
+    q = {}
 
-    res_Fn = (
-        -MDL.INT.gridvec.length[MDL.GLO.dof.gridvec.length]
-        + MDL.EXT.gridvec.length[MDL.GLO.dof.gridvec.length] * Lpf[4]
-    )
+    if plan.force:
+        q[0], q[3] = INT.force.normal, INT.force.shear
 
-    res_Fc = (
-        -MDL.INT.gridvec.components[MDL.GLO.dof.gridvec.components]
-        + MDL.EXT.gridvec.components[MDL.GLO.dof.gridvec.components] * Lpf[5]
-    )
+    if plan.traction:
+        q[12], q[15] = INT.traction.normal, INT.traction.shear
+
+    if plan.gridvec:
+        q[24], q[27] = INT.gridvec.length, INT.gridvec.components
 
-    res_Sy = (
-        -MDL.INT.gridvec.components[[0, 1, 2], [1, 2, 0]][MDL.GLO.dof.gridvec.symmetry]
-        + MDL.INT.gridvec.components[[1, 2, 0], [0, 1, 2]][MDL.GLO.dof.gridvec.symmetry]
+    if 36 in plan.items:
+        Fc = INT.gridvec.components
+        q[36] = Fc[..., [0, 1, 2], [1, 2, 0]] - Fc[..., [1, 2, 0], [0, 1, 2]]
+
+    lpf = np.reshape(lpf, np.shape(lpf) + (1,))
+
+    return plan.scaled * lpf + plan.fixed - _gather(q, plan)
+
+
+def _gather(q, plan, ndim=0):
+    """Gather the selected DOFs of a plan from a dict of (stacks of)
+    candidate internal quantities, stored by their offsets in the vector of
+    candidates (see `system.plan`), with `ndim` trailing axes (e.g.
+    variables of derivatives). Only the selected candidate items are
+    copied."""
+
+    parts = {}
+    for offset in plan.items:
+        value = q[offset]
+        # shear and gridvector components have two axes
+        size = 9 if offset in [3, 15, 27] else 3
+        axis = value.ndim - ndim - (2 if size == 9 else 1)
+        parts[offset] = value.reshape(
+            value.shape[:axis] + (size,) + value.shape[value.ndim - ndim :]
+        )
+
+    shape = np.broadcast_shapes(
+        *[value.shape[: value.ndim - ndim - 1] for value in parts.values()]
+    )
+    tail = np.broadcast_shapes(
+        *[value.shape[value.ndim - ndim :] for value in parts.values()]
     )
 
-    residuals = np.hstack((res_fn, res_fs, res_tn, res_ts, res_Fn, res_Fc, res_Sy))
+    # candidates of unselected items are not initialized (and not gathered)
+    tail_slices = (slice(None),) * ndim
+    candidates = np.empty(shape + (39,) + tail)
+    for offset, value in parts.items():
+        size = value.shape[value.ndim - ndim - 1]
+        candidates[(..., slice(offset, offset + size)) + tail_slices] = value
 
-    return residuals, MDL
+    return candidates[(..., plan.index) + tail_slices]
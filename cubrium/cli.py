@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import argparse
+import itertools
+
+from . import loadcase
+from . import results
+from . import writer
+from .assembly import recover
+from .parallel import model, sweep
+
+formats = ["native", "xdmf", "hdf5"]
+
+# names of the public loadcase functions
+_loadcases = [
+    name
+    for name, value in vars(loadcase).items()
+    if callable(value)
+    and not name.startswith("_")
+    and getattr(value, "__module__", None) == loadcase.__name__
+]
+
+
+def manifest(filename):
+    "Read a job manifest from a JSON or TOML file."
+
+    if str(filename).endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+
+        with open(filename, "rb") as f:
+            return tomllib.load(f)
+
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def jobs(manifest):
+    """Named jobs of a manifest: the cartesian product of its `materials`
+    (with `matid`, `parameters` and an optional `name`) and `loadcases`
+    (names of functions in `cubrium.loadcase`) followed by explicit `jobs`
+    (with `matid`, `parameters`, `loadcase` and an optional `name`, which
+    must not contain path separators). The common solver `options` are
+    updated by the `options` of a job."""
+
+    options = manifest.get("options", {})
+    materials = manifest.get("materials", [])
+    loadcases = manifest.get("loadcases", [])
+
+    entries = [
+        dict(
+            name="{0}_{1}".format(material.get("name", "material%d" % m), lcase),
+            loadcase=lcase,
+            **{key: value for key, value in material.items() if key != "name"}
+        )
+        for (m, material), lcase in itertools.product(enumerate(materials), loadcases)
+    ]
+    entries += [
+        dict(job, name=job.get("name", "job%d" % j))
+        for j, job in enumerate(manifest.get("jobs", []))
+    ]
+
+    out = []
+    for entry in entries:
+        if entry["loadcase"] not in _loadcases:
+            raise ValueError("Unknown loadcase '%s'." % entry["loadcase"])
+
+        job = dict(entry, options=dict(options, **entry.get("options", {})))
+        out.append(job)
+
+    names = [job["name"] for job in out]
+    if len(set(names)) < len(names):
+        raise ValueError("Job names must be unique.")
+
+    # job names are used as filenames in the output directory
+    for name in names:
+        if name in ["", ".", ".."] or any(sep in name for sep in "/\\"):
+            raise ValueError("Invalid job name '%s'." % name)
+
+    return out
+
+
+def run(manifest, output=None, format=None, processes=None, verbose=True):
+    """Solve all jobs of a manifest (see `jobs`) in a local worker pool (see
+    `parallel.sweep`) and write the results of each job as soon as it is
+    finished to the `output` directory in the `native` (see `results`),
+    `xdmf` or `hdf5` (see `writer`) format. Only the converged steps of the
+    jobs are kept in memory; results are recovered and written one job at a
+    time. Failed jobs do not stop the run, their error messages are stored
+    in `summary.json` together with the number of steps of all jobs. Jobs
+    whose continuation stopped early are failed jobs, their (partial)
+    results are not written."""
+
+    settings = manifest.get("output", {})
+    path = output or settings.get("path", "results")
+    format = format or settings.get("format", "native")
+    processes = processes or manifest.get("processes")
+
+    if format not in formats:
+        raise ValueError("Unknown output format '%s'." % format)
+
+    jobs_ = jobs(manifest)
+    summary = [None] * len(jobs_)
+    os.makedirs(path, exist_ok=True)
+
+    start = time.perf_counter()
+
+    def finished(j, Y, error):
+
+        job = jobs_[j]
+
+        if error is None:
+            try:
+                _write(os.path.join(path, job["name"]), Y, job, format)
+            except Exception as err:
+                error = repr(err)
+
+        summary[j] = dict(name=job["name"], steps=len(Y), error=error)
+
+        if verbose:
+            done = sum(s is not None for s in summary)
+            status = "{0:d} steps".format(len(Y)) if error is None else error
+            print(
+                "[{0:{w}d}/{1:d}] {2:s}: {3:s} ({4:.2f} jobs/s)".format(
+                    done,
+                    len(jobs_),
+                    job["name"],
+                    status,
+                    done / (time.perf_counter() - start),
+                    w=len(str(len(jobs_))),
+                )
+            )
+
+    res = sweep(
+        jobs_,
+        processes=processes,
+        callback=finished,
+        maxtasksperchild=manifest.get("maxtasksperchild"),
+    )
+
+    res.success = [s["error"] is None for s in summary]
+    res.error = [s["error"] for s in summary]
+
+    with open(os.path.join(path, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=4)
+
+    if verbose:
+        print(
+            "{0:d} of {1:d} jobs finished successfully in {2:.1f} s.".format(
+                sum(res.success), len(jobs_), time.perf_counter() - start
+            )
+        )
+
+    return res
+
+
+def main(argv=None):
+    "Command-line interface of the batch runner (see `run`)."
+
+    parser = argparse.ArgumentParser(
+        prog="cubrium",
+        description="Solve all jobs of a manifest (JSON or TOML) in a local "
+        "worker pool.",
+    )
+    parser.add_argument("manifest", help="job manifest (.json or .toml)")
+    parser.add_argument("-o", "--output", help="output directory")
+    parser.add_argument("-f", "--format", choices=formats, help="output format")
+    parser.add_argument("-p", "--processes", type=int, help="number of workers")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress")
+    args = parser.parse_args(argv)
+
+    res = run(
+        manifest(args.manifest),
+        output=args.output,
+        format=args.format,
+        processes=args.processes,
+        verbose=not args.quiet,
+    )
+
+    return 0 if all(res.success) else 1
+
+
+def _write(filename, Y, job, format):
+    "Write the converged steps of a job with all recovered quantities."
+
+    MDL = model(job)
+
+    if format == "native":
+        results.save(filename, Y, MDL)
+    else:
+        getattr(writer, format)(recover(Y, MDL, columnar=True), filename)
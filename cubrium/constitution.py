@@ -5,93 +5,419 @@ Created on Fri Feb 12 08:33:10 2021
 @author: adutz
 """
 
+from functools import wraps
+
 import numpy as np
 import numpy.linalg as la
 
-from .helpers import ddot, dya, cdya, dev
+from .helpers import dya33, cdya, dev, trace, transpose
+from . import hyperdual
+
+
+def vectorized(umat):
+    """Mark a umat which accepts stacks of deformation gradients `F[..., 3, 3]`
+    (and stacks of material parameters) as vectorized (decorator). The
+    built-in umats and umats created by `hyperelastic` are vectorized."""
+    umat.vectorized = True
+    return umat
+
+
+def vectorize(umat):
+    """Thin wrapper for a umat which accepts a single deformation gradient
+    only: stacks of deformation gradients `F[..., 3, 3]` are evaluated by
+    calling the umat once per deformation gradient (with common material
+    parameters). Vectorized umats are returned unchanged."""
+
+    if getattr(umat, "vectorized", False):
+        return umat
+
+    @wraps(umat)
+    def stacked(F, parameters, tangent=False):
+        F = np.asarray(F)
+
+        if F.ndim == 2:
+            return umat(F, parameters, tangent=True) if tangent else umat(F, parameters)
+
+        res = [stacked(Fi, parameters, tangent) for Fi in F.reshape(-1, 3, 3)]
+
+        if not tangent:
+            return np.reshape(res, F.shape)
+
+        P, A = zip(*res)
+        return np.reshape(P, F.shape), np.reshape(A, F.shape + (3, 3))
+
+    return stacked
 
 
-def umat_nh_compr(F, parameters):
+@vectorized
+def umat_nh_compr(F, parameters, tangent=False):
     """(U)ser (MAT)erial Function.
     Returns First Piola-Kirchhoff stress tensor for a given
-    deformation gradient tensor with a list of material parameters."""
+    deformation gradient tensor with a list of material parameters.
+    Optionally returns its derivative w.r.t. the deformation gradient."""
 
     # expand list of material parameters
-    mu, K = parameters[:2]
+    mu, K = _parameters(parameters, 2)
 
     J = la.det(F)
-    return mu * (F - J * la.inv(F).T) + K * np.log(J) * la.inv(F).T
+    invFT = transpose(la.inv(F))
+    P = _expand(mu) * (F - _expand(J) * invFT) + _expand(K * np.log(J)) * invFT
 
+    if not tangent:
+        return P
 
-def umat_svk(F, parameters):
+    C = transpose(F) @ F
+    invC = la.inv(C)
+    S = _expand(mu) * (np.eye(3) - _expand(J) * invC) + _expand(K * np.log(J)) * invC
+    D = _expand((K - mu * J) / 2, 4) * dya33(invC, invC) + _expand(
+        mu * J - K * np.log(J), 4
+    ) * cdya(invC, invC)
+
+    return P, _tangent(F, S, D)
+
+
+@vectorized
+def umat_svk(F, parameters, tangent=False):
     """(U)ser (MAT)erial Function.
     Returns First Piola-Kirchhoff stress tensor for a given
-    deformation gradient tensor with a list of material parameters."""
+    deformation gradient tensor with a list of material parameters.
+    Optionally returns its derivative w.r.t. the deformation gradient."""
 
     # expand list of material parameters
-    mu, K = parameters[:2]
+    mu, K = _parameters(parameters, 2)
     gamma = K - 2 / 3 * mu
 
-    C = F.T @ F
-    E = 1 / 2 * (C - np.eye(3))
-    S = 2 * mu * E + gamma * np.trace(E) * np.eye(3)
+    I = np.eye(3)
+    C = transpose(F) @ F
+    E = 1 / 2 * (C - I)
+    S = 2 * _expand(mu) * E + _expand(gamma * trace(E)) * I
+
+    if not tangent:
+        return F @ S
+
+    D = _expand(mu, 4) * cdya(I, I) + _expand(gamma / 2, 4) * dya33(I, I)
 
-    return F @ S
+    return F @ S, _tangent(F, S, D)
 
 
-def umat_ksvk(F, parameters):
+@vectorized
+def umat_ksvk(F, parameters, tangent=False):
     """(U)ser (MAT)erial Function.
     Returns First Piola-Kirchhoff stress tensor for a given
-    deformation gradient tensor with a list of material parameters."""
+    deformation gradient tensor with a list of material parameters.
+    Optionally returns its derivative w.r.t. the deformation gradient."""
 
     # expand list of material parameters
-    mu, K, k = parameters[:3]
-    gamma = K - 2 / 3 * mu
+    mu, K, k = _parameters(parameters, 3)
 
-    C = F.T @ F
+    C = transpose(F) @ F
     wC, vC = la.eigh(C)
-    w = np.sqrt(wC)
-    if k == 0:
-        Ekp = np.log(wC) / 2
-    else:
-        Ekp = 1 / k * (w ** k - 1)
-    Ck = np.sum(np.array([wa ** k * dya(Na, Na) for wa, Na in zip(w, vC.T)]), 0)
-    Ek = np.sum(np.array([Eka * dya(Na, Na) for Eka, Na in zip(Ekp, vC.T)]), 0)
 
-    Sk = 2 * mu * Ek + gamma * np.trace(Ek) * np.eye(3)
+    g, dg = _seth_hill(wC, mu, K, k, tangent)
+
+    return _principal(F, wC, vC, g, dg, tangent)
+
+
+@vectorized
+def umat_ksvk_multi(F, parameters, tangent=False):
+    """(U)ser (MAT)erial Function.
+    Returns First Piola-Kirchhoff stress tensor for a given
+    deformation gradient tensor with a list of material parameter sets.
+    Optionally returns its derivative w.r.t. the deformation gradient."""
+
+    # parameter sets are stored in the second-last axis of the parameters
+    mu, K, k = _parameters(parameters, 3)
+
+    C = transpose(F) @ F
+    wC, vC = la.eigh(C)
+
+    # principal values of all parameter sets are summed up before the
+    # (common) principal directions are applied
+    g, dg = _seth_hill(wC[..., None, :], mu, K, k, tangent)
+    g = np.sum(g, -2)
+    if tangent:
+        dg = np.sum(dg, -3)
+
+    return _principal(F, wC, vC, g, dg, tangent)
+
+
+def _seth_hill(wC, mu, K, k, tangent=False):
+    """Principal values g_a of the second Piola-Kirchhoff stress tensor of
+    the Seth-Hill (ksvk) material for principal values wC of C and
+    optionally their derivatives dg_ab = d(g_a)/d(wC_b)."""
+
+    gamma = K - 2 / 3 * mu
+
+    # principal values are stored in the last axis
+    mu, gamma, k = _expand(mu, 1), _expand(gamma, 1), _expand(k, 1)
 
-    return F @ Sk @ Ck @ la.inv(C)
+    # principal Seth-Hill strains and S = h * dW/dE with h = d(E_a)/d(C_a) * 2
+    Ekp = np.where(k == 0, np.log(wC) / 2, (wC ** (k / 2) - 1) / np.where(k == 0, 1, k))
+    h = wC ** (k / 2 - 1)
+    s = 2 * mu * Ekp + gamma * np.sum(Ekp, -1)[..., None]
+    g = s * h
 
+    if not tangent:
+        return g, None
 
-def umat_ksvk_multi(F, parameters):
-    return np.sum(np.array([umat_ksvk(F, p) for p in parameters]), 0)
+    dg = (2 * _expand(mu, 1) * np.eye(3) + _expand(gamma, 1)) / 2 * np.einsum(
+        "...a,...b->...ab", h, h
+    ) + np.einsum("...a,ab->...ab", s * (k / 2 - 1) * h / wC, np.eye(3))
 
+    return g, dg
 
-def umat_tod(F, parameters):
+
+def _principal(F, wC, vC, g, dg, tangent=False):
+    """First Piola-Kirchhoff stress tensor and optionally its derivative for
+    an isotropic second Piola-Kirchhoff stress tensor S = sum_a g_a N_a x N_a
+    given by its principal values (see `_spectral`)."""
+
+    S = np.einsum("...a,...ia,...ja->...ij", g, vC, vC)
+
+    if not tangent:
+        return F @ S
+
+    return F @ S, _tangent(F, S, _spectral(wC, vC, g, dg))
+
+
+@vectorized
+def umat_tod(F, parameters, tangent=False):
     """(U)ser (MAT)erial Function.
     Returns First Piola-Kirchhoff stress tensor for a given
-    deformation gradient tensor with a list of material parameters."""
+    deformation gradient tensor with a list of material parameters.
+    Optionally returns its derivative w.r.t. the deformation gradient."""
 
     # expand list of material parameters
-    C10, C01, C11, C20, C30, K = parameters[:6]
+    C10, C01, C11, C20, C30, K = _parameters(parameters, 6)
 
     J = la.det(F)
     I = np.eye(3)
-    C = F.T @ F
-    Cu = J ** (-2 / 3) * C
+    C = transpose(F) @ F
+    invC = la.inv(C)
+    Cu = _expand(J ** (-2 / 3)) * C
 
-    I1u = np.trace(Cu)
-    I2u = (I1u ** 2 - np.trace(Cu @ Cu)) / 2
+    I1u = trace(Cu)
+    I2u = (I1u ** 2 - trace(Cu @ Cu)) / 2
 
     W1u = C10 + 2 * C20 * (I1u - 3) + 3 * C30 * (I1u - 3) ** 2 + C11 * (I2u - 3)
     W2u = C01 + C11 * (I1u - 3)
 
-    Su = 2 * W1u * I + 2 * W2u * (I1u * I - Cu)
+    Su = 2 * _expand(W1u) * I + 2 * _expand(W2u) * (_expand(I1u) * I - Cu)
 
     p = K * (J - 1)
 
-    S = dev(Su @ Cu) @ la.inv(C) + p * J * la.inv(C)
-    return F @ S
+    S = dev(Su @ Cu) @ invC + _expand(p * J) * invC
+
+    if not tangent:
+        return F @ S
+
+    # second derivatives of the strain energy function w.r.t. the
+    # isochoric invariants
+    W11u = 2 * C20 + 6 * C30 * (I1u - 3)
+    W12u = C11
+
+    I1 = trace(C)
+    I2 = J ** (4 / 3) * I2u
+
+    # derivatives of the isochoric invariants w.r.t. C
+    dI1u = _expand(J ** (-2 / 3)) * (I - _expand(I1 / 3) * invC)
+    dI2u = _expand(J ** (-4 / 3)) * (_expand(I1) * I - C - _expand(2 / 3 * I2) * invC)
+
+    d2I1u = _expand(J ** (-2 / 3), 4) * (
+        -(dya33(I, invC) + dya33(invC, I)) / 3
+        + _expand(I1 / 9, 4) * dya33(invC, invC)
+        + _expand(I1 / 3, 4) * cdya(invC, invC)
+    )
+    d2I2u = _expand(J ** (-4 / 3), 4) * (
+        dya33(I, I)
+        - cdya(I, I)
+        - 2 / 3 * (dya33(invC, _expand(I1) * I - C) + dya33(_expand(I1) * I - C, invC))
+        + _expand(4 / 9 * I2, 4) * dya33(invC, invC)
+        + _expand(2 / 3 * I2, 4) * cdya(invC, invC)
+    )
+
+    D = 2 * (
+        _expand(W11u, 4) * dya33(dI1u, dI1u)
+        + _expand(W12u, 4) * (dya33(dI1u, dI2u) + dya33(dI2u, dI1u))
+        + _expand(W1u, 4) * d2I1u
+        + _expand(W2u, 4) * d2I2u
+    )
+    D += _expand((K * J + p) * J / 2, 4) * dya33(invC, invC) - _expand(p * J, 4) * cdya(
+        invC, invC
+    )
+
+    return F @ S, _tangent(F, S, D)
+
+
+def hyperelastic(W, invariants=False):
+    """Create a umat from a strain energy function `W(F, parameters)` or, with
+    `invariants=True`, `W(I1, I2, J, parameters)` with the invariants of the
+    right Cauchy-Green deformation tensor and the volume ratio. The stress
+    and its derivative are obtained by forward-mode automatic
+    differentiation with (stacks of) hyper-dual numbers - therefore `W` must
+    be written with operators and the math functions of `cubrium.hyperdual`
+    (`log`, `exp`, `sqrt`, `trace`, `transpose`, `det`). The material
+    parameters are stored in the last axis of `parameters`."""
+
+    if invariants:
+        energy = lambda F, p: W(*_invariants(F), p)
+    else:
+        energy = W
+
+    def umat(F, parameters, tangent=False):
+        """(U)ser (MAT)erial Function.
+        Returns First Piola-Kirchhoff stress tensor for a given
+        deformation gradient tensor with a list of material parameters.
+        Optionally returns its derivative w.r.t. the deformation gradient."""
+
+        p = np.asarray(parameters, dtype=float)
+
+        # the derivatives are stored in additional axes of the deformation
+        # gradients (9 for the gradient, 9 x 9 for the hessian)
+        if not tangent:
+            return hyperdual.gradient(energy, F, p[..., None, :])
+
+        return hyperdual.hessian(energy, F, p[..., None, None, :])
+
+    umat.tangent = True
+    return vectorized(umat)
+
+
+def _invariants(F):
+    "Invariants of the right Cauchy-Green deformation tensor and volume ratio."
+    C = hyperdual.transpose(F) @ F
+    I1 = hyperdual.trace(C)
+    I2 = (I1 ** 2 - hyperdual.trace(C @ C)) / 2
+    J = hyperdual.det(F)
+    return I1, I2, J
+
+
+def register(matid, umat, tangent=None):
+    """Register a umat (e.g. created by `hyperelastic`) for a material id.
+    The material ids of the built-in umats can't be changed. The umat
+    supports `tangent=True` if `tangent` is True (by default if the umat
+    has an attribute `tangent = True`, like the umats of `hyperelastic`)."""
+    if matid in range(5):
+        raise ValueError("Material id %d is reserved for a built-in umat." % matid)
+    if tangent is None:
+        tangent = getattr(umat, "tangent", False)
+    _registry[matid] = (umat, bool(tangent))
+
+
+# umats registered by the user with their tangent capability
+_registry = {}
+
+
+def gradient(umat, F, parameters, free=None, eps=1e-6):
+    """Derivative of the First Piola-Kirchhoff stress tensor w.r.t. the
+    `free` material parameters (mask, default all), stored in the last axis.
+    Parameters which enter the stress of a built-in umat linearly are
+    differentiated exactly, all others by central finite-differences."""
+
+    p = np.asarray(parameters, dtype=float)
+
+    if free is None:
+        free = np.ones(p.shape, dtype=bool)
+
+    # indices of the free parameters and of the linear parameters
+    index = np.flatnonzero(free)
+    linear = np.zeros(p.shape, dtype=bool)
+    if umat in _linear:
+        linear[...] = True
+        linear[..., _linear[umat]] = False
+    linear = linear.ravel()
+
+    # stacks of parameters with unit or perturbed parameters
+    h = eps * np.maximum(1, abs(p.ravel()[index]))
+    unit = np.where(linear, 0, p.ravel()) * np.ones((len(index), 1))
+    unit[np.arange(len(index)), index] = 1
+    fwd = p.ravel() * np.ones((len(index), 1))
+    fwd[np.arange(len(index)), index] += h
+    rvs = p.ravel() * np.ones((len(index), 1))
+    rvs[np.arange(len(index)), index] -= h
+
+    # evaluate all parameter stacks in one call of a vectorized umat
+    stacks = np.concatenate((unit, fwd, rvs)).reshape(-1, *p.shape)
+    if getattr(umat, "vectorized", False):
+        P = umat(np.asarray(F)[..., None, :, :], stacks)
+    else:
+        P = np.stack([vectorize(umat)(F, stack) for stack in stacks], axis=-3)
+    P_unit, P_fwd, P_rvs = np.split(P, 3, axis=-3)
+
+    dPdp = np.where(
+        linear[index].reshape(-1, 1, 1),
+        P_unit,
+        (P_fwd - P_rvs) / (2 * h).reshape(-1, 1, 1),
+    )
+
+    return np.moveaxis(dPdp, -3, -1)
+
+
+# non-linear material parameters of built-in umats (all others enter the
+# stress linearly)
+_linear = {
+    umat_svk: [],
+    umat_ksvk: [2],
+    umat_ksvk_multi: [2],
+    umat_tod: [],
+    umat_nh_compr: [],
+}
+
+
+def _parameters(parameters, n):
+    """Split (stacks of) material parameters into arrays of the first `n`
+    parameters (the parameters are stored in the last axis)."""
+    p = np.asarray(parameters, dtype=float)
+    return [p[..., a] for a in range(n)]
+
+
+def _expand(x, ndim=2):
+    "Append axes to (stacks of) scalars for the broadcasting with tensors."
+    return np.reshape(x, np.shape(x) + (1,) * ndim)
+
+
+def _spectral(c, V, g, dg, eps=1e-8):
+    """Derivative of an isotropic tensor function S = sum_a g_a N_a x N_a
+    w.r.t. C with principal values c, principal directions V and the
+    derivatives dg_ab = d(g_a)/d(c_b). Repeated principal values are
+    treated by the limit of the difference quotient."""
+
+    dc = c[..., :, None] - c[..., None, :]
+    repeated = abs(dc) <= eps * _expand(np.max(abs(c), -1))
+
+    theta = (
+        np.where(
+            repeated,
+            np.einsum("...aa->...a", dg)[..., :, None] - dg,
+            (g[..., :, None] - g[..., None, :]) / np.where(repeated, 1, dc),
+        )
+        * (1 - np.eye(3))
+    )
+
+    # dyadic products N_a x N_b of the principal directions as (..., ab, ij)
+    NN = np.einsum("...ia,...jb->...abij", V, V)
+    Naa = np.einsum("...aaij->...aij", NN).reshape(*NN.shape[:-4], 3, 9)
+    NNt = np.swapaxes(NN, -3, -4).reshape(*NN.shape[:-4], 9, 9)
+    NN = NN.reshape(*NN.shape[:-4], 9, 9)
+
+    D = np.swapaxes(Naa, -1, -2) @ (dg @ Naa) + np.swapaxes(NN, -1, -2) @ (
+        theta.reshape(*theta.shape[:-2], 9, 1) / 2 * (NN + NNt)
+    )
+
+    return D.reshape(*D.shape[:-2], 3, 3, 3, 3)
+
+
+def _tangent(F, S, D):
+    """Derivative of the First Piola-Kirchhoff stress tensor w.r.t. the
+    deformation gradient for a given second Piola-Kirchhoff stress tensor
+    S and its derivative D w.r.t. the right Cauchy-Green deformation tensor."""
+    # contract F_im D_mjlq F_kq by matrix products of reshaped tensors
+    FD = F @ D.reshape(*D.shape[:-4], 3, 27)
+    FDF = (FD.reshape(*FD.shape[:-2], 27, 3) @ transpose(F)).reshape(
+        *FD.shape[:-2], 3, 3, 3, 3
+    )
+
+    return np.einsum("ik,...jl->...ijkl", np.eye(3), S) + 2 * np.swapaxes(FDF, -1, -2)
 
 
 def umatdb(matid):
@@ -107,4 +433,11 @@ def umatdb(matid):
     elif matid == 4:
         return umat_nh_compr
     else:
-        return
+        return _registry.get(matid, (None, False))[0]
+
+
+def tangentdb(matid):
+    "Internal switcher: does the umat of a material id support `tangent=True`."
+    if matid in range(5):
+        return True
+    return _registry.get(matid, (None, False))[1]
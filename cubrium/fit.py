@@ -0,0 +1,142 @@
+import numpy as np
+from types import SimpleNamespace
+
+from . import constitution
+from . import kinematics
+from . import solver
+from .assembly import derivative
+
+
+def experiment(MDL, x, lpf, component=0):
+    """Experimental data for an (updated) model: measured
+    load-proportionality-factors `lpf` at prescribed values `x` of a
+    component of the (flattened) displacement gradient or of the length of
+    a gridvector (see `solver.prescribed`)."""
+
+    exp = SimpleNamespace()
+    exp.MDL = MDL
+    exp.component = component
+    exp.x = np.asarray(x, dtype=float)
+    exp.lpf = np.asarray(lpf, dtype=float)
+
+    # equilibrium states of the last evaluation (warm start)
+    exp.Y = None
+
+    return exp
+
+
+def evaluate(parameters, experiments, free=None, gradient=False, maxiter=20, tol=1e-10):
+    """Residuals (model minus measured load-proportionality-factors) of all
+    points of all experiments for given material parameters.
+
+    The equilibrium states of all points of an experiment are solved
+    simultaneously, warm-started from the states of the previous
+    evaluation. Optionally, the derivatives of the residuals w.r.t. the
+    `free` material parameters (mask, default all) are returned. They are
+    obtained from the implicit derivative of the equilibrium states."""
+
+    parameters = np.asarray(parameters, dtype=float)
+
+    if free is None:
+        free = np.ones(parameters.shape, dtype=bool)
+
+    res, jac = [], []
+
+    for exp in experiments:
+
+        MDL = _model(exp.MDL, parameters)
+
+        Y = exp.Y = solver.prescribed(MDL, exp.x, exp.component, exp.Y, maxiter, tol)
+        res.append(Y[:, -1] - exp.lpf)
+
+        if gradient:
+            H, lpf = Y[:, :-1], Y[:, -1]
+            F = kinematics.defgrd(H)
+
+            # derivative of the residuals w.r.t. the material parameters
+            dPdp = constitution.gradient(MDL.GLO.constitution.umat, F, parameters, free)
+            dFn = np.zeros(F.shape[:-1] + dPdp.shape[-1:] + (1,))
+            dFc = np.zeros(F.shape + dPdp.shape[-1:] + (1,))
+            dRdp = derivative(dPdp[..., None], dFn, dFc, MDL)
+            dRdp = np.concatenate((dRdp, np.zeros_like(dRdp[..., :1, :])), -2)
+
+            dYdp = -np.linalg.solve(solver._jac_prescribed(Y, MDL, exp.component), dRdp)
+            jac.append(dYdp[:, -1])
+
+    if gradient:
+        return np.concatenate(res), np.concatenate(jac)
+
+    return np.concatenate(res)
+
+
+def _model(MDL, parameters):
+    """Copy of a (frozen) model with other material parameters (the model
+    itself is not modified)."""
+    GLO = SimpleNamespace(**vars(MDL.GLO))
+    GLO.constitution = SimpleNamespace(**vars(MDL.GLO.constitution))
+    GLO.constitution.parameters = parameters
+    return SimpleNamespace(GLO=GLO, EXT=MDL.EXT)
+
+
+def identify(
+    experiments,
+    parameters,
+    free=None,
+    maxiter=50,
+    damping=1e-3,
+    tol=1e-10,
+    newton_maxiter=20,
+    newton_tol=1e-10,
+):
+    """Identify material parameters by a Levenberg-Marquardt least-squares
+    fit of the load-proportionality-factors to the experimental data of
+    one or more experiments (loadcases). Only the `free` parameters (mask,
+    default all) are changed."""
+
+    p = np.array(parameters, dtype=float)
+
+    if free is None:
+        free = np.ones(p.shape, dtype=bool)
+
+    kwargs = dict(free=free, gradient=True, maxiter=newton_maxiter, tol=newton_tol)
+
+    r, J = evaluate(p, experiments, **kwargs)
+    cost = r @ r / 2
+    success = cost <= tol ** 2
+    iteration = 0
+
+    while not success and iteration < maxiter:
+
+        iteration += 1
+
+        A = J.T @ J
+        dp = np.linalg.solve(A + damping * np.diag(np.diag(A)), -J.T @ r)
+
+        q = p.copy()
+        q[free] += dp
+
+        try:
+            rq, Jq = evaluate(q, experiments, **kwargs)
+            costq = rq @ rq / 2
+        except (RuntimeError, np.linalg.LinAlgError):
+            costq = np.inf
+
+        if costq < cost:
+            success = (
+                cost - costq <= tol * cost
+                or costq <= tol ** 2
+                or np.linalg.norm(dp) <= tol * np.linalg.norm(q[free])
+            )
+            p, r, J, cost = q, rq, Jq, costq
+            damping /= 10
+        else:
+            damping *= 10
+
+    res = SimpleNamespace()
+    res.parameters = p
+    res.residuals = r
+    res.cost = cost
+    res.niterations = iteration
+    res.success = success
+
+    return res
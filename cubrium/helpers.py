@@ -18,11 +18,34 @@ def dya(A, B):
     return np.tensordot(A, B, 0)
 
 
+def ddot33(A, B):
+    "Returns the double-dot product of two (stacks of) second-order tensors."
+    return np.einsum("...ij,...ij->...", A, B)
+
+
+def dya33(A, B):
+    "Returns the dyadic product of two (stacks of) second-order tensors."
+    return np.einsum("...ij,...kl->...ijkl", A, B)
+
+
 def cdya(A, B):
-    "Returns the cross-dyadic product of two tensors."
-    return (np.einsum("ij,kl->ikjl", A, B) + np.einsum("ij,kl->ilkj", A, B)) / 2
+    "Returns the cross-dyadic product of two (stacks of) second-order tensors."
+    return (
+        np.einsum("...ik,...jl->...ijkl", A, B)
+        + np.einsum("...il,...kj->...ijkl", A, B)
+    ) / 2
 
 
 def dev(A):
-    "Returns the deviator of a tensor."
-    return A - np.trace(A) / 3 * np.eye(3)
+    "Returns the deviator of (a stack of) tensors."
+    return A - trace(A)[..., None, None] / 3 * np.eye(3)
+
+
+def trace(A):
+    "Returns the trace of (a stack of) tensors."
+    return np.trace(A, axis1=-2, axis2=-1)
+
+
+def transpose(A):
+    "Returns the transpose of (a stack of) tensors."
+    return np.swapaxes(A, -1, -2)
@@ -0,0 +1,194 @@
+import numpy as np
+
+
+class HyperDual:
+    """(Stacks of) hyper-dual numbers x + d1 e1 + d2 e2 + d12 e1 e2 with
+    e1^2 = e2^2 = 0. The first and second derivatives of a function are
+    obtained from the e1 (e2) and the e1 e2 parts of its result. All parts
+    are NumPy arrays which are broadcasted against each other."""
+
+    # NumPy arrays defer to the (reflected) operators of hyper-dual numbers
+    __array_ufunc__ = None
+
+    def __init__(self, x, d1=0.0, d2=0.0, d12=0.0):
+        self.x = np.asarray(x, dtype=float)
+        self.d1 = d1
+        self.d2 = d2
+        self.d12 = d12
+
+    @property
+    def shape(self):
+        return np.broadcast_shapes(
+            *[np.shape(p) for p in (self.x, self.d1, self.d2, self.d12)]
+        )
+
+    @property
+    def T(self):
+        return transpose(self)
+
+    def __getitem__(self, key):
+        key = key if isinstance(key, tuple) else (key,)
+        if Ellipsis not in key:
+            key = (Ellipsis,) + key
+        return HyperDual(*[p if np.ndim(p) == 0 else p[key] for p in self.parts()])
+
+    def parts(self):
+        return self.x, self.d1, self.d2, self.d12
+
+    def __neg__(self):
+        return HyperDual(-self.x, -self.d1, -self.d2, -self.d12)
+
+    def __add__(self, other):
+        if isinstance(other, HyperDual):
+            return HyperDual(*[a + b for a, b in zip(self.parts(), other.parts())])
+        return HyperDual(self.x + other, self.d1, self.d2, self.d12)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        if isinstance(other, HyperDual):
+            return _product(self, other, np.multiply)
+        return HyperDual(*[p * other for p in self.parts()])
+
+    __rmul__ = __mul__
+
+    def __matmul__(self, other):
+        if not isinstance(other, HyperDual):
+            other = HyperDual(other)
+        return _product(self, other, np.matmul)
+
+    def __rmatmul__(self, other):
+        return _product(HyperDual(other), self, np.matmul)
+
+    def __truediv__(self, other):
+        if isinstance(other, HyperDual):
+            return self * other ** -1
+        return self * (1 / other)
+
+    def __rtruediv__(self, other):
+        return self ** -1 * other
+
+    def __pow__(self, n):
+        if n == 0 or n == 1:
+            return _chain(self, self.x ** n, n * self.x ** 0, 0.0)
+        return _chain(
+            self, self.x ** n, n * self.x ** (n - 1), n * (n - 1) * self.x ** (n - 2)
+        )
+
+
+def _broadcast(part, dual):
+    "Broadcast a part of a hyper-dual number to the shape of the number."
+    return np.broadcast_to(part, dual.shape)
+
+
+def _product(a, b, op):
+    "Product of two hyper-dual numbers for a bilinear operation `op`."
+
+    def product(p, q):
+        # zero (scalar) parts are skipped
+        if np.ndim(p) == 0 and p == 0 or np.ndim(q) == 0 and q == 0:
+            return 0.0
+        return op(p, q)
+
+    return HyperDual(
+        op(a.x, b.x),
+        product(a.x, b.d1) + product(a.d1, b.x),
+        product(a.x, b.d2) + product(a.d2, b.x),
+        product(a.x, b.d12)
+        + product(a.d1, b.d2)
+        + product(a.d2, b.d1)
+        + product(a.d12, b.x),
+    )
+
+
+def _chain(a, f, df, d2f):
+    """Apply a scalar function with value f and derivatives df, d2f (all
+    evaluated at the real part) to a hyper-dual number."""
+    return HyperDual(f, df * a.d1, df * a.d2, df * a.d12 + d2f * a.d1 * a.d2)
+
+
+def log(a):
+    "Natural logarithm."
+    if not isinstance(a, HyperDual):
+        return np.log(a)
+    return _chain(a, np.log(a.x), 1 / a.x, -1 / a.x ** 2)
+
+
+def exp(a):
+    "Exponential function."
+    if not isinstance(a, HyperDual):
+        return np.exp(a)
+    f = np.exp(a.x)
+    return _chain(a, f, f, f)
+
+
+def sqrt(a):
+    "Square root."
+    if not isinstance(a, HyperDual):
+        return np.sqrt(a)
+    f = np.sqrt(a.x)
+    return _chain(a, f, 1 / (2 * f), -1 / (4 * f ** 3))
+
+
+def trace(A):
+    "Trace of (a stack of) tensors."
+    if not isinstance(A, HyperDual):
+        return np.trace(A, axis1=-2, axis2=-1)
+    return HyperDual(
+        *[p if np.ndim(p) == 0 else np.trace(p, axis1=-2, axis2=-1) for p in A.parts()]
+    )
+
+
+def transpose(A):
+    "Transpose of (a stack of) tensors."
+    if not isinstance(A, HyperDual):
+        return np.swapaxes(A, -1, -2)
+    return HyperDual(
+        *[p if np.ndim(p) == 0 else np.swapaxes(p, -1, -2) for p in A.parts()]
+    )
+
+
+def det(A):
+    "Determinant of (a stack of) 3x3 tensors."
+    return (
+        A[0, 0] * (A[1, 1] * A[2, 2] - A[1, 2] * A[2, 1])
+        - A[0, 1] * (A[1, 0] * A[2, 2] - A[1, 2] * A[2, 0])
+        + A[0, 2] * (A[1, 0] * A[2, 1] - A[1, 1] * A[2, 0])
+    )
+
+
+def hessian(W, F, *args):
+    """Gradient and hessian of a scalar function W(F, *args) w.r.t. (a stack
+    of) tensors F. All 81 pairs of components are evaluated at once with
+    stacked hyper-dual numbers."""
+
+    F = np.asarray(F, dtype=float)
+    E = np.eye(9).reshape(9, 3, 3)
+
+    res = W(
+        HyperDual(F[..., None, None, :, :], E[:, None], E[None, :], 0.0),
+        *args,
+    )
+
+    dW = _broadcast(res.d1, res)[..., :, 0].reshape(*res.shape[:-2], 3, 3)
+    d2W = _broadcast(res.d12, res).reshape(*res.shape[:-2], 3, 3, 3, 3)
+
+    return dW, d2W
+
+
+def gradient(W, F, *args):
+    """Gradient of a scalar function W(F, *args) w.r.t. (a stack of) tensors
+    F. All 9 components are evaluated at once with stacked dual numbers."""
+
+    F = np.asarray(F, dtype=float)
+    E = np.eye(9).reshape(9, 3, 3)
+
+    res = W(HyperDual(F[..., None, :, :], E, 0.0, 0.0), *args)
+
+    return _broadcast(res.d1, res).reshape(*res.shape[:-1], 3, 3)
@@ -0,0 +1,122 @@
+import time
+import contextlib
+import contextvars
+from functools import wraps
+from types import SimpleNamespace
+
+# report of the active profile context (context-local, i.e. per thread and
+# asyncio task)
+_report = contextvars.ContextVar("report", default=None)
+
+# names of the timed functions
+_names = []
+
+
+@contextlib.contextmanager
+def profile(MDL=None):
+    """Count and time the calls of the system equations, the jacobians, the
+    kinetics, the umat of a model `MDL` (all umats if omitted) and the
+    Newton iterations of the native solver inside a context. Yields a
+    report with the number of `calls` and the (inclusive) `time` in seconds
+    per function as well as the total number of Newton `iterations` and of
+    `rejections` (solves which did not converge). Neither the model nor the
+    package are modified and only the calls in the current thread (or
+    asyncio task) are counted. Outside the context, nothing is recorded.
+
+        with cubrium.instrument.profile(MDL) as report:
+            Res = cubrium.solve(MDL)(x0=x0, lpf0=lpf0)
+
+        print(cubrium.instrument.summary(report))
+
+    """
+
+    report = SimpleNamespace(iterations=0, rejections=0)
+    report.calls = dict.fromkeys(_names, 0)
+    report.time = dict.fromkeys(_names, 0.0)
+    report.umat = None if MDL is None else MDL.GLO.constitution.umat
+
+    token = _report.set(report)
+
+    try:
+        yield report
+    finally:
+        _report.reset(token)
+
+
+def timed(fun):
+    """Decorator which counts and times the calls of a function inside a
+    `profile` context (see `profile`)."""
+
+    name = fun.__module__[8:] + "." + fun.__name__
+    _names.append(name)
+
+    @wraps(fun)
+    def wrapper(*args, **kwargs):
+        report = _report.get()
+        if report is None:
+            return fun(*args, **kwargs)
+        return _call(report, name, fun, *args, **kwargs)
+
+    return wrapper
+
+
+def umat(fun):
+    """Return a umat which is timed inside a `profile` context (the umat
+    itself outside of it)."""
+
+    report = _report.get()
+    if report is None:
+        return fun
+
+    # single-F umats are wrapped (see `constitution.vectorize`)
+    if report.umat is not None and getattr(fun, "__wrapped__", fun) is not report.umat:
+        return fun
+
+    name = "umat." + getattr(fun, "__name__", "user")
+
+    def wrapper(*args, **kwargs):
+        return _call(report, name, fun, *args, **kwargs)
+
+    return wrapper
+
+
+def summary(report):
+    "Table of the calls and times of a report, sorted by time."
+
+    lines = [
+        "| Function                  |    Calls |  Time in s | Time per Call |",
+        "|---------------------------|----------|------------|---------------|",
+    ]
+    names = [name for name in report.calls if report.calls[name] > 0]
+    for name in sorted(names, key=report.time.get, reverse=True):
+        lines.append(
+            "| {0:25s} | {1:8d} | {2:10.4f} | {3:10.2e} s |".format(
+                name,
+                report.calls[name],
+                report.time[name],
+                report.time[name] / report.calls[name],
+            )
+        )
+    lines.append("")
+    lines.append("Newton iterations: {0:d}".format(report.iterations))
+    lines.append("Rejected solves:   {0:d}".format(report.rejections))
+
+    return "\n".join(lines)
+
+
+def _call(report, name, fun, *args, **kwargs):
+    "Count and time the call of a function."
+
+    report.calls.setdefault(name, 0)
+    report.time.setdefault(name, 0.0)
+
+    start = time.perf_counter()
+    try:
+        res = fun(*args, **kwargs)
+    finally:
+        report.calls[name] += 1
+        report.time[name] += time.perf_counter() - start
+    if name == "solver._newton":
+        report.iterations += res.niterations
+        report.rejections += not res.success
+    return res
@@ -0,0 +1,354 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from . import constitution
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# the compiled backend is only available if numba is installed
+available = numba is not None
+
+
+def _njit(fun):
+    "Compile a function with numba (if installed)."
+    if numba is None:
+        return fun
+    return numba.njit(cache=True)(fun)
+
+
+@_njit
+def _det(A):
+    return (
+        A[0, 0] * (A[1, 1] * A[2, 2] - A[1, 2] * A[2, 1])
+        - A[0, 1] * (A[1, 0] * A[2, 2] - A[1, 2] * A[2, 0])
+        + A[0, 2] * (A[1, 0] * A[2, 1] - A[1, 1] * A[2, 0])
+    )
+
+
+@_njit
+def _inv(A):
+    B = np.empty((3, 3))
+    B[0, 0] = A[1, 1] * A[2, 2] - A[1, 2] * A[2, 1]
+    B[0, 1] = A[0, 2] * A[2, 1] - A[0, 1] * A[2, 2]
+    B[0, 2] = A[0, 1] * A[1, 2] - A[0, 2] * A[1, 1]
+    B[1, 0] = A[1, 2] * A[2, 0] - A[1, 0] * A[2, 2]
+    B[1, 1] = A[0, 0] * A[2, 2] - A[0, 2] * A[2, 0]
+    B[1, 2] = A[0, 2] * A[1, 0] - A[0, 0] * A[1, 2]
+    B[2, 0] = A[1, 0] * A[2, 1] - A[1, 1] * A[2, 0]
+    B[2, 1] = A[0, 1] * A[2, 0] - A[0, 0] * A[2, 1]
+    B[2, 2] = A[0, 0] * A[1, 1] - A[0, 1] * A[1, 0]
+    return B / _det(A)
+
+
+@_njit
+def _dot(A, B):
+    C = np.zeros((3, 3))
+    for i in range(3):
+        for j in range(3):
+            for k in range(3):
+                C[i, j] += A[i, k] * B[k, j]
+    return C
+
+
+@_njit
+def _rcg(F):
+    "Right Cauchy-Green deformation tensor."
+    C = np.zeros((3, 3))
+    for i in range(3):
+        for j in range(3):
+            for k in range(3):
+                C[i, j] += F[k, i] * F[k, j]
+    return C
+
+
+@_njit
+def _eigh(A):
+    "Principal values and directions of a symmetric tensor (cyclic Jacobi)."
+
+    A = A.copy()
+    V = np.eye(3)
+
+    for sweep in range(50):
+
+        off = A[0, 1] ** 2 + A[0, 2] ** 2 + A[1, 2] ** 2
+        if off <= 1e-40 * (A[0, 0] ** 2 + A[1, 1] ** 2 + A[2, 2] ** 2):
+            break
+
+        for p in range(2):
+            for q in range(p + 1, 3):
+
+                if A[p, q] == 0:
+                    continue
+
+                theta = (A[q, q] - A[p, p]) / (2 * A[p, q])
+                t = np.sign(theta) / (abs(theta) + np.sqrt(theta ** 2 + 1))
+                if theta == 0:
+                    t = 1.0
+                c = 1 / np.sqrt(t ** 2 + 1)
+                s = t * c
+
+                for k in range(3):
+                    akp, akq = A[k, p], A[k, q]
+                    A[k, p], A[k, q] = c * akp - s * akq, s * akp + c * akq
+                for k in range(3):
+                    apk, aqk = A[p, k], A[q, k]
+                    A[p, k], A[q, k] = c * apk - s * aqk, s * apk + c * aqk
+                for k in range(3):
+                    vkp, vkq = V[k, p], V[k, q]
+                    V[k, p], V[k, q] = c * vkp - s * vkq, s * vkp + c * vkq
+
+    return np.array([A[0, 0], A[1, 1], A[2, 2]]), V
+
+
+@_njit
+def _svk(F, p):
+    mu, K = p[0], p[1]
+    gamma = K - 2 / 3 * mu
+
+    E = (_rcg(F) - np.eye(3)) / 2
+    S = 2 * mu * E + gamma * np.trace(E) * np.eye(3)
+
+    return _dot(F, S)
+
+
+@_njit
+def _seth_hill(wC, p):
+    "Principal values of the second Piola-Kirchhoff stress tensor (ksvk)."
+    mu, K, k = p[0], p[1], p[2]
+    gamma = K - 2 / 3 * mu
+
+    Ekp = np.empty(3)
+    for a in range(3):
+        if k == 0:
+            Ekp[a] = np.log(wC[a]) / 2
+        else:
+            Ekp[a] = (wC[a] ** (k / 2) - 1) / k
+
+    return (2 * mu * Ekp + gamma * np.sum(Ekp)) * wC ** (k / 2 - 1)
+
+
+@_njit
+def _ksvk(F, p):
+    "Seth-Hill material with one or more parameter sets (decomposed once)."
+
+    wC, vC = _eigh(_rcg(F))
+
+    g = np.zeros(3)
+    for a in range(len(p) // 3):
+        g += _seth_hill(wC, p[3 * a : 3 * a + 3])
+
+    S = np.zeros((3, 3))
+    for a in range(3):
+        for i in range(3):
+            for j in range(3):
+                S[i, j] += g[a] * vC[i, a] * vC[j, a]
+
+    return _dot(F, S)
+
+
+@_njit
+def _tod(F, p):
+    C10, C01, C11, C20, C30, K = p[0], p[1], p[2], p[3], p[4], p[5]
+
+    J = _det(F)
+    I = np.eye(3)
+    C = _rcg(F)
+    invC = _inv(C)
+    Cu = J ** (-2 / 3) * C
+
+    I1u = np.trace(Cu)
+    I2u = (I1u ** 2 - np.trace(_dot(Cu, Cu))) / 2
+
+    W1u = C10 + 2 * C20 * (I1u - 3) + 3 * C30 * (I1u - 3) ** 2 + C11 * (I2u - 3)
+    W2u = C01 + C11 * (I1u - 3)
+
+    Su = 2 * W1u * I + 2 * W2u * (I1u * I - Cu)
+    SuCu = _dot(Su, Cu)
+
+    S = _dot(SuCu - np.trace(SuCu) / 3 * I, invC) + K * (J - 1) * J * invC
+
+    return _dot(F, S)
+
+
+@_njit
+def _nh_compr(F, p):
+    mu, K = p[0], p[1]
+
+    J = _det(F)
+    invFT = _inv(F).T
+
+    return mu * (F - J * invFT) + K * np.log(J) * invFT
+
+
+@_njit
+def _umat(matid, F, p):
+    "Compiled built-in umat selected by material id."
+    if matid == 0:
+        return _svk(F, p)
+    elif matid == 1 or matid == 2:
+        return _ksvk(F, p)
+    elif matid == 3:
+        return _tod(F, p)
+    else:
+        return _nh_compr(F, p)
+
+
+@_njit
+def _umat_stack(matid, F, p):
+    P = np.empty_like(F)
+    for a in range(len(F)):
+        P[a] = _umat(matid, F[a], p[a])
+    return P
+
+
+@_njit
+def _residuals(matid, H, lpf, p, dX, dA, index, ext, group):
+    """Residuals of the equilibrium equations of a stack of states. All
+    internal quantities are stored in one vector of candidates (normal and
+    shear components of forces, tractions and gridvectors and the symmetry
+    conditions) and the residuals of the selected DOFs are gathered."""
+
+    nX = np.sqrt(np.sum(dX ** 2, 0))
+    nA = np.sqrt(np.sum(dA ** 2, 0))
+
+    res = np.empty((len(H), len(index)))
+    q = np.empty(39)
+    Lpf = np.ones(6)
+
+    for a in range(len(H)):
+
+        F = np.eye(3) + H[a].reshape(3, 3)
+        P = _umat(matid, F, p[a])
+        df = _dot(P, dA)
+
+        for i in range(3):
+            dfn = 0.0
+            for b in range(3):
+                dfn += dA[b, i] * df[b, i]
+            q[i] = dfn / nA[i]
+            q[12 + i] = q[i] / nA[i]
+
+            for j in range(3):
+                dfs = 0.0
+                if i != j:
+                    for b in range(3):
+                        dfs += dX[b, j] * df[b, i]
+                    dfs /= nX[j]
+                q[3 + 3 * i + j] = dfs
+                q[15 + 3 * i + j] = dfs / nA[i]
+
+            q[24 + i] = np.sqrt(F[0, i] ** 2 + F[1, i] ** 2 + F[2, i] ** 2)
+
+            for j in range(3):
+                q[27 + 3 * i + j] = F[i, j]
+
+        q[36] = F[0, 1] - F[1, 0]
+        q[37] = F[1, 2] - F[2, 1]
+        q[38] = F[2, 0] - F[0, 2]
+
+        Lpf[:] = 1
+        Lpf[group[-1]] = lpf[a]
+
+        for r in range(len(index)):
+            res[a, r] = -q[index[r]] + ext[r] * Lpf[group[r]]
+
+    return res
+
+
+def _stack(F, parameters, nsets=0):
+    """Flatten a stack of deformation gradients and broadcast the material
+    parameters (with `nsets` parameter sets) to the stack."""
+    F = np.asarray(F, dtype=float)
+    p = np.asarray(parameters, dtype=float)
+    if F.ndim == 2 and p.ndim == 1 + bool(nsets):
+        return (), F.reshape(1, 3, 3), p.reshape(1, -1)
+    shape = np.broadcast_shapes(F.shape[:-2], p.shape[: p.ndim - 1 - bool(nsets)])
+    F = np.broadcast_to(F, shape + (3, 3)).reshape(-1, 3, 3)
+    p = np.broadcast_to(p, shape + p.shape[p.ndim - 1 - bool(nsets) :])
+    return shape, np.ascontiguousarray(F), np.ascontiguousarray(p.reshape(len(F), -1))
+
+
+def _compiled(matid, umat):
+    "Compiled version of a built-in umat (the tangent is evaluated by NumPy)."
+
+    def compiled(F, parameters, tangent=False):
+        if tangent:
+            return umat(F, parameters, tangent=True)
+        shape, F, p = _stack(F, parameters, nsets=matid == 2)
+        return _umat_stack(matid, F, p).reshape(shape + (3, 3))
+
+    compiled.__name__ = umat.__name__
+    compiled.__doc__ = umat.__doc__
+    return constitution.vectorized(compiled)
+
+
+umat_svk = _compiled(0, constitution.umat_svk)
+umat_ksvk = _compiled(1, constitution.umat_ksvk)
+umat_ksvk_multi = _compiled(2, constitution.umat_ksvk_multi)
+umat_tod = _compiled(3, constitution.umat_tod)
+umat_nh_compr = _compiled(4, constitution.umat_nh_compr)
+
+# material ids of the built-in umats with compiled kernels
+_matid = {
+    constitution.umat_svk: 0,
+    constitution.umat_ksvk: 1,
+    constitution.umat_ksvk_multi: 2,
+    constitution.umat_tod: 3,
+    constitution.umat_nh_compr: 4,
+}
+
+
+def plan(MDL):
+    """Compiled residual plan of an updated model: the positions of the
+    selected DOFs in the vector of candidate internal quantities, their
+    external values and load groups (see `system.plan`). Returns None for
+    user materials."""
+
+    umat = MDL.GLO.constitution.umat
+    if umat not in _matid:
+        return None
+
+    kernel = SimpleNamespace()
+    kernel.matid = _matid[umat]
+    kernel.index = MDL.GLO.plan.index
+    kernel.ext = MDL.GLO.plan.ext
+
+    # the load group of the lpf is stored in the last item
+    kernel.group = np.append(MDL.GLO.plan.group, int(MDL.GLO.lpftype))
+
+    return kernel
+
+
+def equilibrium(H, lpf, MDL):
+    """Compiled system equilibrium function returning only residuals (see
+    `assembly.equilibrium`), evaluated with the plan `MDL.GLO.kernel`."""
+
+    kernel = MDL.GLO.kernel
+    H = np.asarray(H, dtype=float)
+
+    # displacement gradients are broadcasted like deformation gradients
+    shape, H, p = _stack(
+        H.reshape(H.shape[:-1] + (3, 3)),
+        MDL.GLO.constitution.parameters,
+        nsets=kernel.matid == 2,
+    )
+    lpf = np.ascontiguousarray(np.broadcast_to(lpf, shape), dtype=float).ravel()
+
+    res = _residuals(
+        kernel.matid,
+        H.reshape(-1, 9),
+        lpf,
+        p,
+        np.asarray(MDL.GLO.cube.edges, dtype=float),
+        np.asarray(MDL.GLO.cube.areas, dtype=float),
+        kernel.index,
+        kernel.ext,
+        kernel.group,
+    )
+
+    return res.reshape(shape + (len(kernel.index),))
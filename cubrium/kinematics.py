@@ -9,12 +9,9 @@ import numpy as np
 
 
 def gridvecns(F):
-    "Normal and shear components of gridvectors (edges of cube)."
+    "Normal and shear components of (stacks of) gridvectors (edges of cube)."
 
-    Fn = np.zeros(3)
-    Fs = np.zeros((3, 3))
-    for i in range(3):
-        Fn[i] = np.linalg.norm(F[:, i])
+    Fn = np.linalg.norm(F, axis=-2)
 
     Fs = F.copy()
     # np.fill_diagonal(Fs,np.nan)
@@ -23,5 +20,19 @@ def gridvecns(F):
 
 
 def defgrd(H):
-    "Calculates deformation gradient from displacement gradient tensor."
-    return np.eye(3) + H.reshape(3, 3)
+    "Calculates (stacks of) deformation gradients from displacement gradients."
+    H = np.asarray(H)
+    return np.eye(3) + H.reshape(*H.shape[:-1], 3, 3)
+
+
+def gridvecns_tangent(F):
+    "Derivatives of normal and shear components of gridvectors w.r.t. F."
+
+    Fn = np.linalg.norm(F, axis=-2)
+    dFn = np.einsum("il,...ki->...ikl", np.eye(3), F / Fn[..., None, :])
+
+    dFs = np.einsum("ik,jl->ijkl", np.eye(3), np.eye(3)) * np.ones(
+        F.shape[:-2] + (1, 1, 1, 1)
+    )
+
+    return dFn, dFs
@@ -7,38 +7,61 @@ Created on Fri Feb 12 08:32:06 2021
 
 import numpy as np
 
+from . import instrument
 
-def force(F, P, dX, dA):
-    "Differential force on undeformed differential area elements."
-    df = P(F) @ dA
-
-    dfn = np.zeros(3)
-    dfs = np.zeros((3, 3))
-    for i in range(3):
-        dfn[i] = np.dot(dA[:, i], df[:, i]) / np.linalg.norm(dA[:, i])
-        for j in range(3):
-            if j != i:
-                dfs[i, j] = np.dot(dX[:, j], df[:, i]) / np.linalg.norm(dX[:, j])
+
+@instrument.timed
+def force(P, dX, dA):
+    """Differential force on undeformed differential area elements for a
+    given (stack of) First Piola-Kirchhoff stress tensor(s)."""
+    df = P @ dA
+
+    dfn = np.einsum("ai,...ai->...i", dA, df) / np.linalg.norm(dA, axis=0)
+    dfs = (
+        np.einsum("aj,...ai->...ij", dX, df)
+        / np.linalg.norm(dX, axis=0)
+        * (1 - np.eye(3))
+    )
     return df, dfn, dfs
 
 
+@instrument.timed
 def cauchy(F, P):
-    return 1 / np.linalg.det(F) * P(F) @ F.T
-
-
-def traction(F, P, dX, dA):
-    "Traction vectors on undeformed differential are elements."
-    df = P(F) @ dA
-
-    tn = np.zeros(3)
-    ts = np.zeros((3, 3))
-    for i in range(3):
-        tn[i] = np.dot(dA[:, i], df[:, i]) / np.linalg.norm(dA[:, i]) ** 2
-        for j in range(3):
-            if j != i:
-                ts[i, j] = (
-                    np.dot(dX[:, j], df[:, i])
-                    / np.linalg.norm(dA[:, i])
-                    / np.linalg.norm(dX[:, j])
-                )
-    return df / np.linalg.norm(dA, axis=0), tn, ts
+    "Cauchy stress tensor for a given First Piola-Kirchhoff stress tensor."
+    return 1 / np.linalg.det(F)[..., None, None] * P @ np.swapaxes(F, -1, -2)
+
+
+@instrument.timed
+def traction(P, dX, dA):
+    """Traction vectors on undeformed differential are elements for a given
+    (stack of) First Piola-Kirchhoff stress tensor(s)."""
+    df, dfn, dfs = force(P, dX, dA)
+
+    dA_norm = np.linalg.norm(dA, axis=0)
+    return df / dA_norm, dfn / dA_norm, dfs / dA_norm.reshape(3, 1)
+
+
+@instrument.timed
+def force_tangent(A, dX, dA):
+    """Derivatives of the normal and shear components of the differential
+    forces w.r.t. the deformation gradient for a given derivative A of the
+    First Piola-Kirchhoff stress tensor."""
+    dfn = np.einsum("ai,...abkl,bi->...ikl", dA, A, dA) / np.linalg.norm(
+        dA, axis=0
+    ).reshape(3, 1, 1)
+    dfs = (
+        np.einsum("aj,...abkl,bi->...ijkl", dX, A, dA)
+        / np.linalg.norm(dX, axis=0).reshape(1, 3, 1, 1)
+        * (1 - np.eye(3)).reshape(3, 3, 1, 1)
+    )
+    return dfn, dfs
+
+
+@instrument.timed
+def traction_tangent(A, dX, dA):
+    """Derivatives of the normal and shear components of the traction
+    vectors w.r.t. the deformation gradient for a given derivative A of the
+    First Piola-Kirchhoff stress tensor."""
+    dfn, dfs = force_tangent(A, dX, dA)
+    dA_norm = np.linalg.norm(dA, axis=0)
+    return dfn / dA_norm.reshape(3, 1, 1), dfs / dA_norm.reshape(3, 1, 1, 1)
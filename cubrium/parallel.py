@@ -0,0 +1,215 @@
+import io
+import contextlib
+import multiprocessing as mp
+from types import SimpleNamespace
+
+import numpy as np
+
+from . import loadcase
+from .system import init, update
+from .solver import solve, batch
+
+
+def grid(matid, parameters, loadcases, **options):
+    """Jobs for the cartesian product of a list of material parameter sets and
+    a list of loadcases (names of functions in `cubrium.loadcase` or
+    functions) with common solver options."""
+    return [
+        dict(matid=matid, parameters=p, loadcase=lc, options=options)
+        for p in parameters
+        for lc in loadcases
+    ]
+
+
+def model(job):
+    """Init and update a model for a job, given as dict with the material
+    (`matid` or `umat` with optional `tangent`), its `parameters` and a
+    `loadcase`."""
+
+    MDL = init()
+
+    if "umat" in job:
+        MDL.GLO.constitution.umat = job["umat"]
+        MDL.GLO.constitution.tangent = job.get("tangent", False)
+    else:
+        MDL.GLO.constitution.matid = job["matid"]
+    MDL.GLO.constitution.parameters = job["parameters"]
+
+    lcase = job["loadcase"]
+    if isinstance(lcase, str):
+        lcase = getattr(loadcase, lcase)
+
+    return update(lcase(MDL))
+
+
+def sweep(
+    jobs,
+    processes=None,
+    maxsteps=80,
+    verbose=False,
+    callback=None,
+    maxtasksperchild=None,
+):
+    """Solve a list of jobs (see `grid` and `model`) in a process pool.
+
+    The converged steps of all jobs are written to a shared-memory array.
+    Models are created inside the worker processes and, on platforms which
+    support forking, the jobs are inherited by the workers - therefore
+    jobs with user materials (lambdas, partials, closures) need not be
+    picklable. An optional `callback(j, Y, error)` is called in the main
+    process as soon as a job is finished (in the order of completion) with
+    its converged steps. Workers are replaced after `maxtasksperchild` jobs.
+
+    Returns a namespace with the padded extended unknowns `Y[job, step]`,
+    the number of converged `steps` per job, a `success` flag (False if the
+    job failed or its continuation stopped early, see `lockstep`) and the
+    `error` message of each job as well as a tidy `table` with one row per
+    converged step."""
+
+    nsteps = 1 + max(job.get("options", {}).get("maxsteps", maxsteps) for job in jobs)
+
+    if "fork" in mp.get_all_start_methods():
+        ctx = mp.get_context("fork")
+    else:
+        ctx = mp.get_context("spawn")
+
+    # shared-memory result arrays (padded with nan)
+    Y = ctx.RawArray("d", len(jobs) * nsteps * 10)
+    steps = ctx.RawArray("q", len(jobs))
+    np.frombuffer(Y)[:] = np.nan
+
+    initargs = (jobs, Y, steps, nsteps, maxsteps, verbose)
+
+    Yv = np.frombuffer(Y).reshape(len(jobs), nsteps, 10)
+    stepsv = np.frombuffer(steps, dtype=np.int64)
+    errors = [None] * len(jobs)
+
+    def finished(j, error):
+        errors[j] = error
+        if callback is not None:
+            callback(j, Yv[j, : stepsv[j]].copy(), error)
+
+    if processes == 1:
+        _init(*initargs)
+        for j in range(len(jobs)):
+            finished(j, _run(j))
+    else:
+        with ctx.Pool(
+            processes,
+            initializer=_init,
+            initargs=initargs,
+            maxtasksperchild=maxtasksperchild,
+        ) as pool:
+            for j, error in pool.imap_unordered(_task, range(len(jobs))):
+                finished(j, error)
+
+    res = SimpleNamespace()
+    res.jobs = jobs
+    res.Y = Yv.copy()
+    res.steps = stepsv.copy()
+    res.error = errors
+    res.success = np.array([e is None for e in errors])
+    res.table = table(jobs, res.Y, res.steps)
+
+    return res
+
+
+def lockstep(jobs, maxsteps=80):
+    """Solve a list of jobs (see `grid` and `model`) in lockstep by one
+    batched continuation in the current process (see `solver.batch`). All
+    jobs must have the same solver options. Returns the same namespace as
+    `sweep`, the continuation of jobs without `success` stopped early."""
+
+    options = [job.get("options", {}) for job in jobs]
+    if any(opts != options[0] for opts in options):
+        raise ValueError("Lockstep continuation requires common solver options.")
+
+    kwargs = dict(maxsteps=maxsteps)
+    kwargs.update(options[0])
+
+    out = batch([model(job) for job in jobs], **kwargs)
+
+    res = SimpleNamespace()
+    res.jobs = jobs
+    res.Y = out.Y
+    res.steps = out.steps
+    res.error = [None if s else "Numerical continuation stopped." for s in out.success]
+    res.success = out.success
+    res.table = table(jobs, res.Y, res.steps)
+
+    return res
+
+
+def table(jobs, Y, steps):
+    "Tidy table (structured array) with one row per converged step of all jobs."
+
+    dtype = [
+        ("job", int),
+        ("step", int),
+        ("matid", int),
+        ("loadcase", "U32"),
+        ("lpf", float),
+        ("H", float, (9,)),
+    ]
+    rows = np.zeros(int(np.sum(steps)), dtype=dtype)
+
+    start = 0
+    for j, (job, n) in enumerate(zip(jobs, steps)):
+        lcase = job["loadcase"]
+        if not isinstance(lcase, str):
+            lcase = lcase.__name__
+
+        rows[start : start + n]["job"] = j
+        rows[start : start + n]["step"] = np.arange(n)
+        rows[start : start + n]["matid"] = job.get("matid", -1)
+        rows[start : start + n]["loadcase"] = lcase
+        rows[start : start + n]["lpf"] = Y[j, :n, -1]
+        rows[start : start + n]["H"] = Y[j, :n, :-1]
+        start += n
+
+    return rows
+
+
+def _init(jobs, Y, steps, nsteps, maxsteps, verbose):
+    "Initialize the (inherited or unpickled) job list and result arrays."
+    global _jobs, _Y, _steps, _maxsteps, _verbose
+    _jobs = jobs
+    _Y = np.frombuffer(Y).reshape(len(jobs), nsteps, 10)
+    _steps = np.frombuffer(steps, dtype=np.int64)
+    _maxsteps = maxsteps
+    _verbose = verbose
+
+
+def _task(j):
+    "Solve job `j` and return its index with the error message (or None)."
+    return j, _run(j)
+
+
+def _run(j):
+    "Solve job `j` and store its converged steps in the result arrays."
+
+    job = _jobs[j]
+
+    options = dict(x0=np.zeros(9), lpf0=0.0, maxsteps=_maxsteps, verbose=_verbose)
+    options.update(job.get("options", {}))
+
+    if _verbose:
+        out = contextlib.nullcontext()
+    else:
+        out = contextlib.redirect_stdout(io.StringIO())
+
+    try:
+        with out:
+            MDL = model(job)
+            Res = solve(MDL)(**options)
+    except Exception as error:
+        return repr(error)
+
+    Y = np.array([res.x for res in Res])
+    _Y[j, : len(Y)] = Y
+    _steps[j] = len(Y)
+
+    if getattr(Res[-1], "stopped", False):
+        return "Numerical continuation stopped."
+
+    return None
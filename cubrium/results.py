@@ -0,0 +1,153 @@
+import os
+import json
+
+import numpy as np
+
+from .__about__ import __version__
+from .system import init, update
+from .assembly import recover
+
+# columnar arrays of a result (groups of internal quantities and their items)
+_columns = {
+    "": ["Y", "H", "lpf", "cauchy"],
+    "force": ["components", "normal", "shear"],
+    "traction": ["components", "normal", "shear"],
+    "gridvec": ["length", "components", "volumeratio"],
+}
+
+# external quantities of the model definition
+_external = {
+    "force": ["normal", "shear", "components"],
+    "traction": ["normal", "shear", "components"],
+    "gridvec": ["length", "components", "symmetry"],
+}
+
+
+def save(path, Y, MDL):
+    """Save the extended unknowns `Y[step]` of a solution with all recovered
+    internal quantities as columnar arrays (one `.npy` file per array) and
+    the model definition (`model.json`) to a directory."""
+
+    os.makedirs(path, exist_ok=True)
+
+    Y = np.asarray(Y, dtype=float)
+    history = recover(Y, MDL, columnar=True)
+    history.Y = Y
+
+    for group, items in _columns.items():
+        for item in items:
+            array = getattr(getattr(history, group) if group else history, item)
+            np.save(os.path.join(path, _filename(group, item)), array)
+
+    with open(os.path.join(path, "model.json"), "w") as f:
+        json.dump(_definition(MDL, len(Y)), f, indent=2)
+
+    return
+
+
+def load(path, mmap_mode="r"):
+    """Open a result directory. The columnar arrays (e.g. `res.cauchy`,
+    `res.force.normal` or `res.lpf`) are memory-mapped on first access,
+    i.e. a single field (or step) is read without loading the others. The
+    model is re-created from its definition, user materials (without a
+    material id) must be assigned again."""
+
+    res = _Lazy(path, "", mmap_mode)
+    res.GLO = model(path).GLO
+    return res
+
+
+def model(path):
+    "Re-create the model of a result directory from its definition."
+
+    with open(os.path.join(path, "model.json"), "r") as f:
+        definition = json.load(f)
+
+    MDL = init(dlpf=definition["dlpf"], du=definition["du"])
+
+    for group, items in _external.items():
+        for item in items:
+            value = np.array(definition["EXT"][group][item], dtype=float)
+            setattr(getattr(MDL.EXT, group), item, value)
+
+    MDL.GLO.lpftype = _tofloat(definition["lpftype"])
+    MDL.GLO.title = definition["title"]
+    MDL.GLO.cube.edges = np.array(definition["edges"], dtype=float)
+    MDL.GLO.constitution.matid = definition["matid"]
+    MDL.GLO.constitution.parameters = np.array(definition["parameters"])
+
+    return update(MDL)
+
+
+class _Lazy:
+    "Namespace of arrays which are memory-mapped on first access."
+
+    def __init__(self, path, group, mmap_mode):
+        self._path = path
+        self._group = group
+        self._mmap_mode = mmap_mode
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if not self._group and name in _columns:
+            value = _Lazy(self._path, name, self._mmap_mode)
+        elif name in _columns[self._group]:
+            value = np.load(
+                os.path.join(self._path, _filename(self._group, name)),
+                mmap_mode=self._mmap_mode,
+            )
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return list(_columns[self._group]) + (
+            [g for g in _columns if g] if not self._group else []
+        )
+
+
+def _filename(group, item):
+    "File name of a columnar array."
+    return (group + "." if group else "") + item + ".npy"
+
+
+def _tolist(array):
+    "Convert an array to a (nested) list with None in place of nan."
+    array = np.asarray(array, dtype=float)
+    return np.where(np.isnan(array), None, array).tolist()
+
+
+def _tofloat(value):
+    "Convert None to nan."
+    return np.nan if value is None else value
+
+
+def _toint(value):
+    "Convert a (NumPy) integer to int."
+    return None if value is None else int(value)
+
+
+def _definition(MDL, nsteps):
+    "JSON-serializable definition of a model."
+
+    lpftype = MDL.GLO.lpftype
+
+    return dict(
+        version=__version__,
+        nsteps=nsteps,
+        title=getattr(MDL.GLO, "title", None),
+        matid=_toint(getattr(MDL.GLO.constitution, "matid", None)),
+        parameters=np.asarray(MDL.GLO.constitution.parameters, dtype=float).tolist(),
+        lpftype=_toint(None if np.isnan(lpftype) else lpftype),
+        dlpf=MDL.GLO.dlpf,
+        du=MDL.GLO.du,
+        edges=MDL.GLO.cube.edges.tolist(),
+        EXT={
+            group: {
+                item: _tolist(getattr(getattr(MDL.EXT, group), item)) for item in items
+            }
+            for group, items in _external.items()
+        },
+    )
@@ -5,11 +5,1109 @@ Created on Fri Feb 26 10:50:00 2021
 @author: adutz
 """
 
+import os
 from functools import partial
-import contique
+from types import SimpleNamespace
 
-from .assembly import equilibrium
+import numpy as np
 
+from . import instrument
+from . import kinematics
+from .assembly import equilibrium, jacobian, jacobian_lpf
 
-def solve(MDL):
-    return partial(contique.solve, fun=equilibrium, args=(MDL,))
+
+def solve(MDL, engine="native"):
+    """Numeric continuation of the equilibrium equations. The analytic
+    jacobian is used if the umat supports tangents
+    (`MDL.GLO.constitution.tangent`), otherwise it is approximated by
+    finite-differences. The continuation `engine` is either the in-package
+    `"native"` solver (see `continuation`) or `"contique"`."""
+
+    if engine == "native":
+        method = continuation
+    elif engine == "contique":
+        import contique
+
+        method = contique.solve
+    else:
+        raise ValueError("Unknown continuation engine '%s'." % engine)
+
+    if MDL.GLO.constitution.tangent:
+        return partial(
+            method,
+            fun=equilibrium,
+            jac=(jacobian, jacobian_lpf),
+            args=(MDL,),
+        )
+    return partial(method, fun=equilibrium, args=(MDL,))
+
+
+def continuation(
+    fun,
+    x0,
+    lpf0,
+    jac=None,
+    args=(None,),
+    dxmax=0.05,
+    dlpfmax=0.05,
+    control0="lpf",
+    jacmode=2,
+    jaceps=1e-6,
+    maxsteps=80,
+    maxcycles=4,
+    maxiter=20,
+    tol=1e-6,
+    nopt=6,
+    minscale=2 ** -6,
+    maxscale=4.0,
+    rho=0.25,
+    verbose=True,
+    callback=None,
+    checkpoint=None,
+    nsave=None,
+    resume=None,
+    targets=None,
+    component="lpf",
+    critical=False,
+):
+    """Numeric continuation of the equilibrium equations `fun(x, lpf, *args)`
+    with the call signature of `contique.solve`.
+
+    In each step, the greatest component of the (scaled) increment is
+    controlled. The step starts from a tangent (first step) or secant
+    predictor and is corrected by a Newton-Rhapson method which re-uses the
+    jacobian as long as the norm of the equations decreases by `rho` per
+    iteration. The step widths `dxmax` and `dlpfmax` are scaled within
+    `[minscale, maxscale]` by the ratio of `nopt` to the number of
+    iterations of the previous step. A step is bisected if it does not
+    converge in `maxiter` iterations. Without a jacobian `jac=(dfdx, dfdlpf)`,
+    it is approximated by finite-differences of `fun`, which must accept
+    stacks of `x` and `lpf`. An optional `callback(res)` is called with the
+    initial and each converged step (e.g. a `writer.Stream`).
+
+    The state of the continuation (all converged steps, the predictor, the
+    step width and the control component) is saved to a `checkpoint` file
+    when the continuation stops (also if it fails or is interrupted) and,
+    optionally, every `nsave` steps. Each save rewrites all steps, therefore
+    `nsave` should not be too small for long runs. A continuation is
+    extended from a checkpoint with `resume` (`x0`, `lpf0` and `control0`
+    are ignored), its results include the steps of the checkpoint.
+
+    Optional `targets` are reached one after another: values of a
+    `component` of the extended unknowns (1-indexed or `"lpf"`, e.g. a
+    displacement gradient component for a prescribed stretch) or event
+    functions `event(x, lpf, *args)` with the target at their root. A step
+    which passes the next target is shortened to land on it and the
+    continuation stops at the last target. The results of the targets are
+    marked by the index of the target in `res.event`.
+
+    With `critical=True`, the sign of the determinant of the jacobian w.r.t.
+    `x` is monitored at the converged steps. A step which passes a change of
+    sign is shortened to land on the critical point. It is located by an
+    extended system of the equilibrium equations and a null vector of the
+    jacobian (with a fallback to the root of its smallest singular value
+    with the sign of the determinant). The results of critical points are
+    marked by `res.critical` (`"limit"` point or `"bifurcation"`).
+
+    If a step does not converge with the smallest step width (or a target
+    or critical point is not located), the continuation stops early and the
+    last converged step is marked by `res.stopped`."""
+
+    if jac is None:
+        jac = _jacobian(fun, jacmode, jaceps)
+    else:
+        jac = _stack(*jac)
+
+    if resume is None:
+        n = 1 + len(x0)
+        j = n if control0 == "lpf" else control0
+
+        y0 = np.append(np.asarray(x0, dtype=float), lpf0)
+
+        res = _result(y0, _fun(y0, fun, args))
+        res.success = True
+        Res = [res]
+
+        if callback is not None:
+            callback(res)
+
+        scale = 1.0
+        dy = None
+
+    else:
+        Res, dy, scale, j = _restore(resume)
+        y0 = Res[-1].x
+        n = len(y0)
+
+    dymax = np.append(np.ones(n - 1) * dxmax, dlpfmax)
+
+    if targets is not None:
+        k = n if component == "lpf" else component
+        targets = [_target(t, k, fun, args) for t in targets]
+        reached = 1 + max(res.event for res in Res)
+
+        # the start point may be the first target
+        if reached == 0 and targets[0](y0) == 0:
+            Res[0].event = reached = 0
+            reached += 1
+
+        if reached == len(targets):
+            maxsteps = 0
+
+    if critical:
+        detsign = _detsign(y0, jac, args)
+        Res[-1].njev += 1
+
+    if verbose:
+        print("| Step (Cycle) | Control Comp. | Equili. | Scale | Status        |")
+        print("|--------------|---------------|---------|-------|---------------|")
+
+    # state of the last converged step (predictor, step width, control)
+    state = (dy, scale, j)
+    res = Res[-1]
+
+    try:
+        for step in len(Res) + np.arange(maxsteps):
+
+            if dy is None:
+                # tangent predictor with an unit increment of the control component
+                K = _jac(y0, jac, args, j)
+                dy = np.linalg.solve(K, np.append(np.zeros(n - 1), np.sign(j)))
+                res.njev += 1
+
+            cycle = 1
+            cuts = 0
+
+            while True:
+
+                # scale the predictor to the step width of its greatest component
+                dys = dy / dymax
+                j = _control(dys)
+                y1 = y0 + dy * scale / abs(dys[abs(j) - 1])
+
+                res = _newton(fun, jac, args, y1, j, maxiter, tol, rho)
+                res.scale = scale
+
+                control = j
+                if res.success:
+                    control = _control((res.x - y0) / dymax)
+                    if control != j and cycle < maxcycles:
+                        status = "Recycle      "
+                    else:
+                        status = "Success ({:2d}#)".format(res.niterations)
+                else:
+                    status = "Failed       "
+
+                if verbose:
+                    print(
+                        "| {0:4s}     ({1:1d}) | {2:+4d}  => {3:+4d} | {4:.1e} | {5:5.3f} | {6:s} |".format(
+                            "{0:4d}".format(step)
+                            if cycle == 1 and cuts == 0
+                            else "    ",
+                            cycle,
+                            j,
+                            control,
+                            np.linalg.norm(res.fun),
+                            scale,
+                            status,
+                        )
+                    )
+
+                if res.success and control != j and cycle < maxcycles:
+                    # re-solve the step with the new control component
+                    dy = res.x - y0
+                    cycle += 1
+
+                elif res.success:
+                    break
+
+                elif scale / 2 >= minscale:
+                    scale /= 2
+                    cuts += 1
+
+                else:
+                    break
+
+            if not res.success:
+                if verbose:
+                    print("")
+                    print("ERROR. Numerical continuation stopped.")
+                    print("       Step width below `minscale`.")
+                Res[-1].stopped = True
+                break
+
+            if critical:
+                sign = _detsign(res.x, jac, args)
+                res.njev += 1
+
+            if critical and sign != detsign:
+                # shorten the step to land on the critical point
+                res = _critical(fun, jac, args, y0, res, maxiter, tol, rho)
+                res.scale = scale
+
+                if verbose:
+                    print(
+                        "|              | {0:+4d}  => {0:+4d} | {1:.1e} |       | {2:13s} |".format(
+                            res.control, np.linalg.norm(res.fun), res.critical.title()
+                        )
+                    )
+
+                if not res.success:
+                    if verbose:
+                        print("")
+                        print("ERROR. Numerical continuation stopped.")
+                        print("       Critical point not located.")
+                    Res[-1].stopped = True
+                    break
+
+            if targets is not None and _passed(targets[reached], y0, res.x):
+                # shorten the step to land on the next target
+                res = _locate(
+                    targets[reached], fun, jac, args, y0, res, maxiter, tol, rho
+                )
+                res.scale = scale
+
+                if verbose:
+                    print(
+                        "|              | {0:+4d}  => {0:+4d} | {1:.1e} |       | Target ({2:3d}) |".format(
+                            res.control, np.linalg.norm(res.fun), reached
+                        )
+                    )
+
+                if not res.success:
+                    if verbose:
+                        print("")
+                        print("ERROR. Numerical continuation stopped.")
+                        print("       Target not located.")
+                    Res[-1].stopped = True
+                    break
+
+                res.event = reached
+                reached += 1
+
+            elif critical:
+                # the target lies before a critical point of this step
+                detsign = sign
+
+            # secant predictor for the next step
+            dy = res.x - y0
+            y0 = res.x
+            j = res.control
+            Res.append(res)
+
+            scale = np.clip(
+                scale * np.clip(nopt / res.niterations, 0.5, 2), minscale, maxscale
+            )
+            state = (dy, scale, j)
+
+            if nsave and checkpoint is not None and (len(Res) - 1) % nsave == 0:
+                _save(checkpoint, Res, *state)
+
+            if callback is not None:
+                callback(res)
+
+            if targets is not None and reached == len(targets):
+                break
+
+    finally:
+        if checkpoint is not None:
+            _save(checkpoint, Res, *state)
+
+    return Res
+
+
+def _save(filename, Res, dy, scale, j):
+    "Save the converged steps and the state of a continuation to a checkpoint."
+    tmp = str(filename) + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            x=np.array([res.x for res in Res]),
+            fun=np.array([res.fun for res in Res]),
+            **{
+                key: np.array([getattr(res, key) for res in Res])
+                for key in [
+                    "niterations",
+                    "nfev",
+                    "njev",
+                    "control",
+                    "scale",
+                    "event",
+                    "critical",
+                ]
+            },
+            dy=np.empty(0) if dy is None else dy,
+            state=np.array([scale, j]),
+        )
+    # replace the previous checkpoint only if the new one is complete
+    os.replace(tmp, filename)
+
+
+def _restore(filename):
+    "Restore the converged steps and the state of a continuation."
+    with np.load(filename) as data:
+        Res = []
+        for i, (x, f) in enumerate(zip(data["x"], data["fun"])):
+            res = _result(x, f)
+            res.success = True
+            for key in [
+                "niterations",
+                "nfev",
+                "njev",
+                "control",
+                "scale",
+                "event",
+                "critical",
+            ]:
+                setattr(res, key, data[key][i].item())
+            Res.append(res)
+        dy = data["dy"] if len(data["dy"]) else None
+        scale, j = data["state"]
+    return Res, dy, scale, int(j)
+
+
+def _target(target, k, fun, args):
+    """Function of the extended unknowns with a root at the target. A value
+    of the component `k` is also located by this component."""
+
+    if callable(target):
+        return lambda y: target(y[..., :-1], y[..., -1], *args)
+
+    def event(y):
+        return y[..., abs(k) - 1] - target
+
+    event.component = abs(k)
+    return event
+
+
+def _passed(event, y0, y1):
+    "Check if a step from `y0` to `y1` passes (or ends on) the root of an event."
+    g0, g1 = event(y0), event(y1)
+    return g1 == 0 or (g0 != 0 and np.sign(g0) != np.sign(g1))
+
+
+def _locate(event, fun, jac, args, y0, res, maxiter, tol, rho):
+    """Locate the root of an event on the equilibrium path of a step from `y0`
+    to `res.x`. The step is shortened by the regula falsi (Illinois) method
+    on the controlled component. For a value of a component, this component
+    is controlled and the target is reached directly."""
+
+    y1 = res.x
+    nfev = res.nfev
+    njev = res.njev
+
+    if hasattr(event, "component"):
+        i = event.component - 1
+        t = -event(y0) / (y1[i] - y0[i])
+        located = _newton(
+            fun, jac, args, y0 + t * (y1 - y0), event.component, maxiter, tol, rho
+        )
+        located.nfev += nfev
+        located.njev += njev
+        return located
+
+    j = res.control
+    a, b = 0.0, 1.0
+    ga, gb = event(y0), event(y1)
+    side = 0
+    located = res
+
+    for iteration in range(maxiter):
+
+        t = (a * gb - b * ga) / (gb - ga)
+        located = _newton(fun, jac, args, y0 + t * (y1 - y0), j, maxiter, tol, rho)
+        nfev += located.nfev
+        njev += located.njev
+
+        if not located.success:
+            break
+
+        g = event(located.x)
+
+        if abs(g) < tol:
+            break
+
+        if np.sign(g) == np.sign(gb):
+            b, gb = t, g
+            if side == 1:
+                ga /= 2
+            side = 1
+        else:
+            a, ga = t, g
+            if side == -1:
+                gb /= 2
+            side = -1
+
+    else:
+        located.success = False
+
+    located.nfev = nfev
+    located.njev = njev
+    return located
+
+
+def _detsign(y, jac, args):
+    "Sign of the determinant of the jacobian w.r.t. `x`."
+    return np.linalg.slogdet(jac(y[:-1], y[-1], *args)[:, :-1])[0]
+
+
+def _test(jac, args):
+    """Test function of critical points: the smallest singular value of the
+    jacobian w.r.t. `x` with the sign of its determinant."""
+
+    def event(y):
+        K = jac(y[:-1], y[-1], *args)[:, :-1]
+        return np.linalg.slogdet(K)[0] * np.linalg.svd(K, compute_uv=False)[-1]
+
+    return event
+
+
+def _critical(fun, jac, args, y0, res, maxiter, tol, rho, h=1e-7):
+    """Locate a critical point on the equilibrium path of a step from `y0` to
+    `res.x`. Starting from the end of the step with the smaller singular
+    value, the extended system of the equilibrium equations `f(y) = 0`, a
+    singular jacobian `K(y) phi = 0` and a normalized null vector
+    `c phi = 1` is solved by a Newton-Rhapson method. The derivative of
+    `K(y) phi` is approximated by a directional finite-difference of the
+    jacobian. The solution is accepted within the square root of `tol` (the
+    accuracy of a finite-differences jacobian) and the equilibrium is
+    corrected at its controlled component. If the solution is not on the
+    step, the critical point is located as the root of the test function
+    (see `_test`)."""
+
+    y1 = res.x
+    n = len(y1)
+    j = abs(res.control) - 1
+    nfev = res.nfev
+    njev = res.njev + 2
+
+    S, V = zip(
+        *[np.linalg.svd(jac(y[:-1], y[-1], *args)[:, :-1])[1:] for y in (y0, y1)]
+    )
+    start = np.argmin([s[-1] for s in S])
+
+    y = [y0, y1][start].copy()
+    c = phi = V[start][-1]
+    norm = np.inf
+
+    for iteration in range(maxiter):
+
+        J = jac(y[:-1], y[-1], *args)
+        K = J[:, :-1]
+        g = np.concatenate((_fun(y, fun, args), K @ phi, [c @ phi - 1]))
+        nfev += 1
+        njev += 1
+
+        if not np.all(np.isfinite(g)):
+            break
+
+        if np.linalg.norm(g) < norm:
+            norm, ycrit = np.linalg.norm(g), y
+
+        if norm < tol:
+            break
+
+        dKphi = (jac(y[:-1] + h * phi, y[-1], *args) - J) / h
+        njev += 1
+
+        A = np.zeros((2 * n - 1, 2 * n - 1))
+        A[: n - 1, :n] = J
+        A[n - 1 : -1, :n] = dKphi
+        A[n - 1 : -1, n:] = K
+        A[-1, n:] = c
+
+        try:
+            dz = np.linalg.solve(A, g)
+        except np.linalg.LinAlgError:
+            break
+
+        y = y - dz[:n]
+        phi = phi - dz[n:]
+
+    # the critical point must be on the step
+    if norm < np.sqrt(tol) and (ycrit[j] - y0[j]) * (ycrit[j] - y1[j]) <= 0:
+        located = _newton(fun, jac, args, ycrit, res.control, maxiter, tol, rho)
+        located.nfev += nfev
+        located.njev += njev
+    else:
+        located = _locate(_test(jac, args), fun, jac, args, y0, res, maxiter, tol, rho)
+
+    # the lpf of a limit point is an extremum on the step
+    y = located.x
+    if (y[-1] - y0[-1]) * (y[-1] - y1[-1]) > 0:
+        located.critical = "limit"
+    else:
+        located.critical = "bifurcation"
+
+    return located
+
+
+def _result(y, f):
+    "Result object of a step."
+    res = SimpleNamespace()
+    res.x = y
+    res.fun = f
+    res.success = False
+    res.niterations = 0
+    res.nfev = 1
+    res.njev = 0
+    res.control = 0
+    res.scale = 0.0
+    res.event = -1
+    res.critical = ""
+    res.stopped = False
+    return res
+
+
+def _fun(y, fun, args):
+    "Equilibrium equations."
+    return fun(y[..., :-1], y[..., -1], *args)
+
+
+def _jac(y, jac, args, j):
+    "Jacobian of the equilibrium equations extended by the control equation."
+    return np.vstack((jac(y[:-1], y[-1], *args), np.eye(len(y))[abs(j) - 1]))
+
+
+@instrument.timed
+def _newton(fun, jac, args, y1, j, maxiter, tol, rho):
+    """Newton-Rhapson method for the equilibrium equations with a fixed
+    control component `j`, starting from the predictor `y1`. The jacobian is
+    only re-evaluated if the norm of the equations decreases slowly."""
+
+    y = y1.copy()
+    f = _fun(y, fun, args)
+    res = _result(y, f)
+
+    g = np.append(f, 0)
+    norm = np.linalg.norm(g)
+    K = None
+
+    try:
+        for iteration in range(1, 1 + maxiter):
+
+            if K is None:
+                K = _jac(y, jac, args, j)
+                res.njev += 1
+
+            y = y - np.linalg.solve(K, g)
+            f = _fun(y, fun, args)
+            res.nfev += 1
+
+            # the control equation is linear and satisfied after one iteration
+            g = np.append(f, 0)
+            normk = np.linalg.norm(g)
+
+            if not np.isfinite(normk):
+                break
+
+            if normk < tol:
+                res.success = True
+                break
+
+            if normk > rho * norm:
+                K = None
+
+            norm = normk
+
+    except np.linalg.LinAlgError:
+        pass
+
+    res.x = y
+    res.fun = f
+    res.niterations = iteration
+    res.control = j
+    return res
+
+
+def _control(dys):
+    "Signed index of the greatest absolute component (1-indexed)."
+    j = abs(dys).argmax()
+    return int((j + 1) * np.sign(dys[j]))
+
+
+def _stack(dfdx, dfdl):
+    "Combined jacobian w.r.t. `x` and `lpf`."
+
+    def jacobian(x, lpf, *args):
+        return np.hstack(
+            (dfdx(x, lpf, *args), np.reshape(dfdl(x, lpf, *args), (-1, 1)))
+        )
+
+    return jacobian
+
+
+def _jacobian(fun, mode=2, h=1e-6):
+    """Forward (`mode=2`) or central (`mode=3`) finite-differences jacobian
+    w.r.t. `x` and `lpf` of a function evaluated on stacks of `x` and `lpf`."""
+
+    def jacobian(x, lpf, *args):
+        y = np.append(x, lpf)
+        dy = h * np.eye(len(y))
+        if mode == 3:
+            f = _fun(np.concatenate((y + dy, y - dy)), fun, args)
+            return (f[: len(y)] - f[len(y) :]).T / (2 * h)
+        f = _fun(np.concatenate((y[None], y + dy)), fun, args)
+        return (f[1:] - f[0]).T / h
+
+    return jacobian
+
+
+def batch(
+    models,
+    x0=None,
+    lpf0=0.0,
+    dxmax=0.05,
+    dlpfmax=0.05,
+    control0="lpf",
+    jaceps=1e-6,
+    maxsteps=80,
+    maxcycles=4,
+    maxiter=20,
+    tol=1e-6,
+    nopt=6,
+    minscale=2 ** -6,
+    maxscale=4.0,
+):
+    """Numeric continuation of many independent (updated) models in lockstep.
+
+    The models may differ in their material parameters, materials and
+    loadcases. Models with the same material and loadcase are evaluated
+    together by one call of the (vectorized) umat with stacked parameters
+    and the small linear equation systems of all models are solved at once.
+    Models which converged or failed are masked out. Otherwise, the
+    continuation follows `continuation` (without re-use of the jacobian).
+
+    Returns a namespace with the extended unknowns `Y[model, step]` (padded
+    with nan), the number of converged `steps` per model and a `success`
+    flag which is False if the continuation of a model stopped early."""
+
+    N = len(models)
+    n = 10
+
+    groups = _groups(models, jaceps)
+
+    y0 = np.zeros((N, n))
+    if x0 is not None:
+        y0[:, :-1] = x0
+    y0[:, -1] = lpf0
+
+    dymax = np.append(np.ones(n - 1) * dxmax, dlpfmax)
+
+    Y = np.nan * np.ones((N, 1 + maxsteps, n))
+    Y[:, 0] = y0
+
+    alive = np.ones(N, dtype=bool)
+    scale = np.ones(N)
+    j = np.ones(N, dtype=int) * (n if control0 == "lpf" else control0)
+
+    # tangent predictor with an unit increment of the control component
+    K = _jac_batch(groups, y0, alive, j)
+    e = np.zeros((N, n))
+    e[:, -1] = np.sign(j)
+    dy, alive = _solve(K, e)
+
+    steps = np.ones(N, dtype=int)
+
+    for step in 1 + np.arange(maxsteps):
+
+        pending = alive.copy()
+        cycle = np.ones(N, dtype=int)
+        y1 = y0.copy()
+        niterations = np.zeros(N, dtype=int)
+
+        while np.any(pending):
+
+            # scale the predictors to the step widths of their greatest components
+            dys = dy[pending] / dymax
+            j[pending] = _controls(dys)
+            dysj = abs(np.take_along_axis(dys, abs(j[pending, None]) - 1, -1))
+            y = y1.copy()
+            y[pending] = y0[pending] + dy[pending] * scale[pending, None] / dysj
+
+            y, converged, iterations = _newton_batch(
+                groups, y, j, pending, maxiter, tol
+            )
+
+            control = np.where(converged, _controls((y - y0) / dymax), j)
+            recycle = converged & (control != j) & (cycle < maxcycles)
+            accepted = converged & ~recycle
+            failed = pending & ~converged
+
+            # re-solve steps with new control components
+            dy[recycle] = (y - y0)[recycle]
+            cycle[recycle] += 1
+
+            y1[accepted] = y[accepted]
+            niterations[accepted] = iterations[accepted]
+            pending &= ~accepted
+
+            # bisect failed steps and stop models with too small step widths
+            scale[failed] /= 2
+            stopped = failed & (scale < minscale)
+            alive &= ~stopped
+            pending &= ~stopped
+
+        if not np.any(alive):
+            break
+
+        # secant predictors for the next step
+        dy[alive] = (y1 - y0)[alive]
+        y0[alive] = y1[alive]
+        Y[alive, step] = y1[alive]
+        steps[alive] += 1
+
+        ratio = np.clip(nopt / np.maximum(niterations, 1), 0.5, 2)
+        scale[alive] = np.clip(scale * ratio, minscale, maxscale)[alive]
+
+    res = SimpleNamespace()
+    res.Y = Y
+    res.steps = steps
+    res.success = alive
+
+    return res
+
+
+def _groups(models, h):
+    """Group models by material and loadcase. Returns a list of groups with
+    the indices of their models and functions for the equilibrium equations
+    and the jacobian of selected models of the group."""
+
+    keys = {}
+    for i, MDL in enumerate(models):
+        keys.setdefault(_key(MDL), []).append(i)
+
+    return [_group(models, np.array(index), h) for index in keys.values()]
+
+
+def _key(MDL):
+    "Hashable key of the material and loadcase of a model."
+
+    key = [
+        MDL.GLO.constitution.umat,
+        MDL.GLO.constitution.tangent,
+        MDL.GLO.lpftype,
+        np.shape(MDL.GLO.constitution.parameters),
+    ]
+
+    # umats which are not vectorized are evaluated per model
+    if not getattr(MDL.GLO.constitution.umat, "vectorized", False):
+        key.append(id(MDL))
+
+    for group in ["force", "traction", "gridvec"]:
+        for name, value in sorted(vars(getattr(MDL.EXT, group)).items()):
+            key.append((group, name, np.asarray(value, dtype=float).tobytes()))
+
+    return tuple(key)
+
+
+def _group(models, index, h):
+    "Equilibrium equations and jacobian of a group of models."
+
+    MDL = SimpleNamespace(
+        GLO=SimpleNamespace(**vars(models[index[0]].GLO)),
+        EXT=models[index[0]].EXT,
+    )
+    MDL.GLO.constitution = SimpleNamespace(**vars(MDL.GLO.constitution))
+    parameters = np.array(
+        [models[i].GLO.constitution.parameters for i in index], dtype=float
+    )
+
+    def model(mask, ndim=0):
+        "Model with stacked parameters of selected members (and `ndim` axes)."
+        if not getattr(MDL.GLO.constitution.umat, "vectorized", False):
+            return MDL
+        p = parameters[mask]
+        MDL.GLO.constitution.parameters = p.reshape(
+            p.shape[:1] + (1,) * ndim + p.shape[1:]
+        )
+        return MDL
+
+    def fun(y, mask):
+        return equilibrium(y[..., :-1], y[..., -1], model(mask, y.ndim - 2))
+
+    def jac(y, mask):
+        if MDL.GLO.constitution.tangent:
+            H, lpf = y[..., :-1], y[..., -1]
+            return np.concatenate(
+                (
+                    jacobian(H, lpf, model(mask)),
+                    jacobian_lpf(H, lpf, model(mask))[..., None],
+                ),
+                -1,
+            )
+
+        # forward finite-differences of all columns in one batched evaluation
+        dy = h * np.eye(y.shape[-1])
+        f = fun(np.concatenate((y[:, None], y[:, None] + dy), 1), mask)
+        return np.swapaxes(f[:, 1:] - f[:, :1], -1, -2) / h
+
+    return SimpleNamespace(index=index, fun=fun, jac=jac)
+
+
+def _fun_batch(groups, y, mask):
+    "Equilibrium equations of the selected models."
+    f = np.zeros((len(y), y.shape[-1] - 1))
+    for group in groups:
+        m = mask[group.index]
+        if np.any(m):
+            f[group.index[m]] = group.fun(y[group.index[m]], m)
+    return f
+
+
+def _jac_batch(groups, y, mask, j):
+    """Jacobians of the equilibrium equations extended by the control
+    equations of the selected models (identity for the others)."""
+    K = np.tile(np.eye(y.shape[-1]), (len(y), 1, 1))
+    for group in groups:
+        m = mask[group.index]
+        if np.any(m):
+            K[group.index[m], :-1] = group.jac(y[group.index[m]], m)
+    K[mask, -1] = np.eye(y.shape[-1])[abs(j[mask]) - 1]
+    return K
+
+
+def _newton_batch(groups, y, j, mask, maxiter, tol):
+    """Newton-Rhapson method for the selected models with fixed control
+    components. Returns the solutions, a mask of the converged models and
+    their number of iterations."""
+
+    y = y.copy()
+    running = mask.copy()
+    converged = np.zeros_like(mask)
+    iterations = np.zeros(len(y), dtype=int)
+
+    # diverging members are masked out by their non-finite residuals
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+
+        f = _fun_batch(groups, y, running)
+
+        for iteration in range(1, 1 + maxiter):
+
+            K = _jac_batch(groups, y, running, j)
+            g = np.concatenate((f, np.zeros((len(y), 1))), -1)
+
+            dy, solved = _solve(K[running], g[running])
+            y[running] -= dy
+
+            running[running] = solved
+            f = _fun_batch(groups, y, running)
+
+            norm = np.linalg.norm(f, axis=-1)
+            running &= np.isfinite(norm)
+
+            iterations[running] = iteration
+            converged |= running & (norm < tol)
+            running &= ~converged
+
+            if not np.any(running):
+                break
+
+    return y, converged, iterations
+
+
+def _solve(K, b):
+    """Solve a stack of linear equation systems. Singular systems are
+    skipped (zero solution) and flagged in the returned mask."""
+
+    try:
+        return np.linalg.solve(K, b[..., None])[..., 0], np.ones(len(K), dtype=bool)
+    except np.linalg.LinAlgError:
+        x = np.zeros_like(b)
+        solved = np.ones(len(K), dtype=bool)
+        for a, (Ka, ba) in enumerate(zip(K, b)):
+            try:
+                x[a] = np.linalg.solve(Ka, ba)
+            except np.linalg.LinAlgError:
+                solved[a] = False
+        return x, solved
+
+
+def _controls(dys):
+    "Signed indices of the greatest absolute components of a stack (1-indexed)."
+    j = abs(dys).argmax(-1)
+    return (j + 1) * np.sign(np.take_along_axis(dys, j[:, None], -1)[:, 0]).astype(int)
+
+
+def prescribed(MDL, x, component=0, Y0=None, maxiter=20, tol=1e-10, maxcuts=10):
+    """Solve the equilibrium states of an (updated) model at prescribed
+    values `x` of a component of the (flattened) displacement gradient or of
+    the length of a gridvector (e.g. `component="gridvec.length[0]"`) by
+    Newton-Rhapson iterations instead of a continuation.
+
+    All states are solved at once, starting from the states `Y0` (if given)
+    or the undeformed state with the prescribed component. States which do
+    not converge are solved again at once, warm-started from the closest
+    previous converged state, as long as this helps. Remaining states are
+    solved one after another with cuts of the increment if necessary.
+    Returns the extended unknowns `Y[n, 10]`."""
+
+    x = np.asarray(x, dtype=float)
+    index = np.arange(len(x))
+
+    if Y0 is None:
+        Y0 = np.zeros((len(x), 10))
+
+    Y, converged = _newton_prescribed(
+        MDL, _guess(Y0, component, x), component, x, maxiter, tol
+    )
+
+    while not np.all(converged):
+
+        # closest previous converged states of the non-converged states
+        previous = np.maximum.accumulate(np.where(converged, index, -1))
+        retry = ~converged & (previous >= 0)
+
+        if not np.any(retry):
+            break
+
+        Yr, convergedr = _newton_prescribed(
+            MDL,
+            _guess(Y[previous[retry]], component, x[retry]),
+            component,
+            x[retry],
+            maxiter,
+            tol,
+        )
+
+        if not np.any(convergedr):
+            break
+
+        Y[retry] = np.where(convergedr[:, None], Yr, Y[retry])
+        converged[retry] = convergedr
+
+    y = np.zeros(10)
+
+    for i, xi in enumerate(x):
+
+        if not converged[i]:
+            Y[i] = _path_prescribed(MDL, y, component, xi, maxiter, tol, maxcuts)
+
+        y = Y[i]
+
+    return Y
+
+
+def _guess(Y, component, x):
+    "Move the prescribed component of the states `Y` to the values `x`."
+
+    Y = np.array(Y, dtype=float)
+
+    if isinstance(component, str):
+        i = _length(component)
+        Y[:, 4 * i] += x - _prescribed(Y, component)[0]
+    else:
+        Y[:, component] = x
+
+    return Y
+
+
+def _length(component):
+    "Index of the gridvector of a prescribed length `gridvec.length[i]`."
+    if not component.startswith("gridvec.length["):
+        raise ValueError("Unknown prescribed component '%s'." % component)
+    return int(component[len("gridvec.length[") : -1])
+
+
+def _prescribed(Y, component):
+    """Value of the prescribed component of the extended unknowns and its
+    derivative."""
+
+    H = Y[..., :-1]
+    dc = np.zeros(Y.shape)
+
+    if isinstance(component, str):
+        i = _length(component)
+        F = kinematics.defgrd(H)
+        c = np.linalg.norm(F[..., :, i], axis=-1)
+        dc[..., i:9:3] = F[..., :, i] / c[..., None]
+    else:
+        c = H[..., component]
+        dc[..., component] = 1
+
+    return c, dc
+
+
+def _fun_prescribed(Y, MDL, component, x):
+    "Equilibrium equations extended by the prescribed component."
+    H, lpf = Y[..., :-1], Y[..., -1]
+    c = _prescribed(Y, component)[0]
+    return np.concatenate((equilibrium(H, lpf, MDL), (c - x)[..., None]), -1)
+
+
+def _jac_prescribed(Y, MDL, component, h=1e-7):
+    "Jacobian of the equilibrium equations extended by the prescribed component."
+
+    H, lpf = Y[..., :-1], Y[..., -1]
+
+    if MDL.GLO.constitution.tangent:
+        dRdy = np.concatenate(
+            (jacobian(H, lpf, MDL), jacobian_lpf(H, lpf, MDL)[..., None]), -1
+        )
+    else:
+        # forward finite-differences of all columns in one batched evaluation
+        dY = h * np.eye(Y.shape[-1])
+        Yh = Y[..., None, :] + dY
+        R = equilibrium(H, lpf, MDL)
+        Rh = equilibrium(Yh[..., :-1], Yh[..., -1], MDL)
+        dRdy = np.swapaxes(Rh - R[..., None, :], -1, -2) / h
+
+    dc = _prescribed(Y, component)[1]
+
+    return np.concatenate((dRdy, dc[..., None, :]), -2)
+
+
+def _newton_prescribed(MDL, Y, component, x, maxiter=20, tol=1e-10):
+    """Batched Newton-Rhapson iterations for the equilibrium states at
+    prescribed values `x` of a component. Only states with a positive
+    volume ratio are converged."""
+
+    Y = np.array(Y, dtype=float)
+    x = np.broadcast_to(x, Y.shape[:-1])
+
+    with np.errstate(all="ignore"):
+        for iteration in range(1 + maxiter):
+
+            f = _fun_prescribed(Y, MDL, component, x)
+            norm = np.linalg.norm(f, axis=-1)
+
+            # states with a non-positive volume ratio are not admissible
+            volumeratio = np.linalg.det(kinematics.defgrd(Y[..., :-1]))
+            converged = (norm < tol) & (volumeratio > 0)
+
+            active = (norm >= tol) & np.isfinite(norm)
+            if not np.any(active) or iteration == maxiter:
+                break
+
+            try:
+                dY = np.linalg.solve(
+                    _jac_prescribed(Y[active], MDL, component),
+                    -f[active][..., None],
+                )
+            except np.linalg.LinAlgError:
+                break
+
+            Y[active] += dY[..., 0]
+
+    return Y, converged
+
+
+def _path_prescribed(MDL, y, component, x, maxiter=20, tol=1e-10, maxcuts=10):
+    """Solve the equilibrium state at a prescribed value `x` of a component,
+    starting from the state `y`. The increment is cut back if necessary."""
+
+    c = _prescribed(y, component)[0]
+
+    for cut in range(1 + maxcuts):
+        n = 2 ** cut
+        ys = y.copy()
+
+        for xs in c + (x - c) * np.arange(1, n + 1) / n:
+            ys, converged = _newton_prescribed(MDL, ys, component, xs, maxiter, tol)
+            if not converged:
+                break
+
+        if converged:
+            return ys
+
+    raise RuntimeError("Equilibrium at prescribed value {0:g} not converged.".format(x))
@@ -13,8 +13,10 @@ from copy import deepcopy as copy
 from . import constitution
 
 
-def init(dlpf=0.05, du=0.05):
-    """Init problem namespaces: GLObal, INTernal and EXTernal quantities."""
+def init(dlpf=0.05, du=0.05, backend="numpy"):
+    """Init problem namespaces: GLObal, INTernal and EXTernal quantities.
+    The residuals of built-in materials are evaluated by compiled kernels
+    with `backend="numba"` (requires numba)."""
 
     MDL = SimpleNamespace()
 
@@ -30,6 +32,8 @@ def init(dlpf=0.05, du=0.05):
     GLO.dlpf = dlpf
     GLO.du = du
     GLO.lpftype = np.nan
+    GLO.backend = backend
+    GLO.kernel = None
 
     GLO.cube = SimpleNamespace()
     GLO.cube.edges = np.eye(3)
@@ -37,6 +41,7 @@ def init(dlpf=0.05, du=0.05):
 
     GLO.constitution = SimpleNamespace()
     GLO.constitution.umat = None
+    GLO.constitution.tangent = False
 
     force = SimpleNamespace()
     force.normal = np.nan * np.ones(3)
@@ -73,22 +78,118 @@ def update(MDL):
     MDL.GLO.dof.gridvec.length = np.where(~np.isnan(MDL.EXT.gridvec.length))
     MDL.GLO.dof.gridvec.components = np.where(~np.isnan(MDL.EXT.gridvec.components))
     MDL.GLO.dof.gridvec.symmetry = np.where(~np.isnan(MDL.EXT.gridvec.symmetry))
-    MDL.GLO.ndof = (
-        len(MDL.GLO.dof.force.normal)
-        + len(MDL.GLO.dof.force.shear[0])
-        + len(MDL.GLO.dof.force.components[0])
-        + len(MDL.GLO.dof.traction.normal)
-        + len(MDL.GLO.dof.traction.shear[0])
-        + len(MDL.GLO.dof.gridvec.length)
-        + len(MDL.GLO.dof.gridvec.components[0])
-        + len(MDL.GLO.dof.gridvec.symmetry)
-    )
-
     MDL.GLO.areas = (
         np.linalg.det(MDL.GLO.cube.edges) * np.linalg.inv(MDL.GLO.cube.edges).T
     )
 
+    MDL.GLO.plan = plan(MDL)
+    MDL.GLO.ndof = len(MDL.GLO.plan.index)
+
     if MDL.GLO.constitution.umat is None:
         MDL.GLO.constitution.umat = constitution.umatdb(MDL.GLO.constitution.matid)
+        MDL.GLO.constitution.tangent = constitution.tangentdb(
+            MDL.GLO.constitution.matid
+        )
+
+    MDL.GLO.kernel = None
+    if MDL.GLO.backend == "numba":
+        from . import jit
+
+        if not jit.available:
+            raise ImportError("The numba backend requires numba.")
+        MDL.GLO.kernel = jit.plan(MDL)
 
     return MDL
+
+
+class Frozen(SimpleNamespace):
+    "Immutable namespace of a frozen problem (see `freeze`)."
+
+    def __setattr__(self, name, value):
+        raise AttributeError("A frozen problem is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("A frozen problem is immutable.")
+
+
+def freeze(MDL):
+    """Freeze the definition of an updated model: the global (material,
+    parameters, DOFs, residual plan and geometry) and the external
+    quantities are copied to immutable namespaces with read-only arrays.
+    The frozen problem contains no solution state, it is shared by
+    concurrent solves (threads) and cheap to pickle (for built-in or other
+    module-level umats). It is accepted wherever a model is expected, e.g.
+    by `solve`, `recover` and the assembly functions."""
+    return Frozen(GLO=_freeze(MDL.GLO), EXT=_freeze(MDL.EXT, exclude=["lpf"]))
+
+
+def _freeze(obj, exclude=()):
+    "Immutable copy of (nested namespaces, lists and tuples of) arrays."
+    if isinstance(obj, SimpleNamespace):
+        return Frozen(
+            **{k: _freeze(v) for k, v in vars(obj).items() if k not in exclude}
+        )
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    if isinstance(obj, np.ndarray):
+        obj = obj.copy()
+        obj.setflags(write=False)
+    return obj
+
+
+# candidate internal quantities: group, item, offset and load group
+_candidates = [
+    ("force", "normal", 0, 0),
+    ("force", "shear", 3, 1),
+    ("traction", "normal", 12, 2),
+    ("traction", "shear", 15, 3),
+    ("gridvec", "length", 24, 4),
+    ("gridvec", "components", 27, 5),
+    ("gridvec", "symmetry", 36, None),
+]
+
+
+def plan(MDL):
+    """Residual plan of a model: all internal quantities are stored in one
+    vector of 39 candidates (normal and shear components of forces,
+    tractions and gridvectors and the symmetry conditions). The residuals
+    of the selected DOFs are `scaled * lpf + fixed - q[..., index]` with the
+    external values split into a LPF-scaled and a fixed part. The `names` of
+    the DOFs and the groups of internal quantities which have to be
+    evaluated (and the offsets of the selected candidate `items`) are also
+    stored."""
+
+    index, ext, group, names, items = [], [], [], [], []
+
+    for item, name, offset, lpfgroup in _candidates:
+        value = getattr(getattr(MDL.EXT, item), name)
+        dof = getattr(getattr(MDL.GLO.dof, item), name)
+        index += list(offset + np.ravel_multi_index(dof, np.shape(value)))
+        names += [
+            "%s.%s[%s]" % (item, name, ", ".join(str(i) for i in d)) for d in zip(*dof)
+        ]
+        if len(dof[0]) > 0:
+            items.append(offset)
+        if lpfgroup is None:
+            # the symmetry conditions have no external values
+            ext += [0.0] * len(dof[0])
+            group += [0] * len(dof[0])
+        else:
+            ext += list(value[dof])
+            group += [lpfgroup] * len(dof[0])
+
+    scaled = np.array(group) == MDL.GLO.lpftype
+
+    PLAN = SimpleNamespace()
+    PLAN.index = np.array(index, dtype=np.int64)
+    PLAN.ext = np.array(ext, dtype=float)
+    PLAN.group = np.array(group, dtype=np.int64)
+    PLAN.scaled = np.where(scaled, PLAN.ext, 0.0)
+    PLAN.fixed = np.where(scaled, 0.0, PLAN.ext)
+    PLAN.names = names
+    PLAN.items = items
+    PLAN.force = np.any((PLAN.index >= 0) & (PLAN.index < 12))
+    PLAN.traction = np.any((PLAN.index >= 12) & (PLAN.index < 24))
+    PLAN.gridvec = np.any(PLAN.index >= 24)
+
+    return PLAN
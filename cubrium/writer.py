@@ -5,14 +5,213 @@ Created on Fri Feb 12 08:37:32 2021
 @author: Andreas
 """
 
+import os
+
 import numpy as np
-import meshio
+
+from .assembly import stack, recover
 
 
 def xdmf(history, filename="timeseries"):
+    """Write a history (list of recovered models or columnar history) to
+    XDMF time-series files of the cube and its face-center points."""
+
+    if isinstance(history, list):
+        history = stack(history)
+
+    X, pts = _geometry(history.GLO.cube.edges)
+    data = _fields(history, X, pts)
+
+    cells = [("hexahedron", np.arange(0, 8).reshape(1, 8))]
+    verts = [("vertex", np.arange(0, 6).reshape(6, 1))]
+
+    filename1 = filename + "_cube.xdmf"
+    with _writer(filename1) as writer:
+        writer.write_points_cells(X, cells)
+        for i, (u, s6, lpf) in enumerate(zip(*data["cube"].values())):
+            writer.write_data(
+                i,
+                point_data={"Displacement": u},
+                cell_data={
+                    "Cauchy Stress": s6,
+                    "Load-Proportionality-Factor (LPF)": lpf,
+                },
+            )
+
+    filename2 = filename + "_points.xdmf"
+    with _writer(filename2) as writer:
+        writer.write_points_cells(pts, verts)
+        for i, (u, rr, tt) in enumerate(zip(*data["points"].values())):
+            writer.write_data(
+                i,
+                point_data={
+                    "Displacement": u,
+                    "Reaction Force": rr,
+                    "Traction": tt,
+                },
+            )
+
+    return
+
+
+def _writer(filename):
+    """XDMF time-series writer of meshio which stores the HDF5 file in the
+    directory of the XDMF file (instead of the current working directory).
+    The HDF5 file is opened in place of `TimeSeriesWriter.__enter__`, which
+    relies on its attributes `h5_filename` and `h5_file` (meshio 4 and 5,
+    see the pinned version range)."""
+
+    import h5py
+    import meshio
+
+    class TimeSeriesWriter(meshio.xdmf.TimeSeriesWriter):
+        def __enter__(self):
+            directory, name = os.path.split(self.filename)
+            self.h5_filename = os.path.join(
+                directory, os.path.splitext(name)[0] + ".h5"
+            )
+            self.h5_file = h5py.File(self.h5_filename, "w")
+            return self
+
+    return TimeSeriesWriter(filename)
+
+
+def hdf5(history, filename="timeseries", fields=None, dtype=None, compression=None):
+    """Write a history (list of recovered models or columnar history) to a
+    single HDF5 file `filename.h5` with XDMF time-series files of the cube and
+    its face-center points (`filename_cube.xdmf` and `filename_points.xdmf`).
+
+    The fields of all steps are evaluated at once and each one is stored as
+    one contiguous dataset with the steps in the first axis. Optionally, only
+    a list of `fields` (by name) is exported with another `dtype`, e.g.
+    `np.float32`, and a `compression` filter (which results in chunked
+    datasets)."""
+
+    import h5py
+
+    if isinstance(history, list):
+        history = stack(history)
+
+    X, pts = _geometry(history.GLO.cube.edges)
+    data = _fields(history, X, pts)
+
+    with h5py.File(filename + ".h5", "w") as h5:
+        _meshes(h5, X, pts)
+        for mesh, values in data.items():
+            for name, value in values.items():
+                if fields is None or name in fields:
+                    h5[mesh].create_dataset(
+                        name,
+                        data=value if dtype is None else value.astype(dtype),
+                        compression=compression,
+                    )
+
+        _timeseries(h5, filename, len(history.lpf), len(history.lpf))
+
+    return
+
+
+class Stream:
+    """Incremental writer which appends the results of each converged step
+    to chunked (and optionally compressed) datasets of a HDF5 file
+    `filename.h5` with XDMF time-series files of the cube and its
+    face-center points (`filename_cube.xdmf` and `filename_points.xdmf`).
+
+    The writer is attached as `callback` to the solver. The time steps of
+    the XDMF files refer to hyperslabs of the datasets, which are resized on
+    demand. The files are kept consistent after each step and are closed
+    cleanly if used as a context manager, also on failure.
+
+        with cubrium.writer.Stream("uniaxial", MDL) as stream:
+            Res = cubrium.solve(MDL)(x0=x0, lpf0=lpf0, callback=stream)
+
+    """
+
+    def __init__(self, filename, MDL, compression=None, chunks=64):
+        import h5py
+
+        self.filename = filename
+        self.MDL = MDL
+        self.compression = compression
+        self.chunks = chunks
+
+        self.h5 = h5py.File(filename + ".h5", "w")
+        self.nsteps = 0
+        self.capacity = 0
+
+        X, pts = _geometry(MDL.GLO.cube.edges)
+        _meshes(self.h5, X, pts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __call__(self, res):
+        "Solver callback: write the extended unknowns of a converged step."
+        self.write(res.x[:-1], res.x[-1])
+
+    def write(self, H, lpf):
+        "Write the results of a step with displacement gradient and lpf."
+
+        history = recover(np.append(H, lpf)[None], self.MDL, columnar=True)
+        fields = _fields(history, *_geometry(self.MDL.GLO.cube.edges))
+
+        if self.nsteps == self.capacity:
+            self._resize(max(self.chunks, 2 * self.capacity), fields)
+            self.nsteps += 1
+            _write(self.h5, fields, self.nsteps - 1)
+            self._rewrite()
+        else:
+            self.nsteps += 1
+            _write(self.h5, fields, self.nsteps - 1)
+            self._append()
+
+        self.h5.flush()
+
+    def close(self):
+        "Shrink the datasets to the number of steps and close all files."
+        if self.h5:
+            self._resize(self.nsteps)
+            self._rewrite()
+            self.h5.close()
+            self.h5 = None
+
+    def _resize(self, capacity, fields=None):
+        "Create or resize the time-dependent datasets."
+        self.capacity = capacity
+        for mesh, data in _items(self.h5, fields):
+            for name, value in data.items():
+                if name in self.h5[mesh]:
+                    self.h5[mesh][name].resize(capacity, axis=0)
+                else:
+                    self.h5[mesh].create_dataset(
+                        name,
+                        shape=(capacity,) + value.shape[1:],
+                        maxshape=(None,) + value.shape[1:],
+                        chunks=(self.chunks,) + value.shape[1:],
+                        dtype=value.dtype,
+                        compression=self.compression,
+                    )
+
+    def _rewrite(self):
+        "Write the XDMF files with all steps."
+        _timeseries(self.h5, self.filename, self.nsteps, self.capacity)
+
+    def _append(self):
+        "Append the last step to the XDMF files (in place of their tail)."
+        for mesh in ["cube", "points"]:
+            with open(self.filename + "_" + mesh + ".xdmf", "rb+") as f:
+                f.seek(-len(_tail), os.SEEK_END)
+                text = _steps(self.h5, mesh, [self.nsteps - 1], self.capacity)
+                f.write((text + _tail).encode())
+
+
+def _geometry(dX):
+    "Points of the cube and of its face-centers for given edges."
 
     p = np.zeros(3)
-    dX = history[0].GLO.cube.edges
 
     X = np.array(
         [
@@ -39,41 +238,163 @@ def xdmf(history, filename="timeseries"):
         ]
     )
 
-    cells = [("hexahedron", np.arange(0, 8).reshape(1, 8))]
-    verts = [("vertex", np.arange(0, 6).reshape(6, 1))]
+    return X, pts
 
-    filename1 = filename + "_cube.xdmf"
-    with meshio.xdmf.TimeSeriesWriter(filename1) as writer:
-        writer.write_points_cells(X, cells)
-        for i, h in enumerate(history):
-            F = h.INT.gridvec.components
-            u = (F @ X.T).T - X
-            s = h.INT.cauchy
-            lpf = h.EXT.lpf
-            s6 = np.array([s[0, 0], s[1, 1], s[2, 2], s[0, 1], s[1, 2], s[2, 0]])
-            writer.write_data(
-                i,
-                point_data={"Displacement": u},
-                cell_data={
-                    "Cauchy Stress": s6.reshape(1, 6),
-                    "Load-Proportionality-Factor (LPF)": np.array([[lpf]]),
-                },
-            )
 
-    filename2 = filename + "_points.xdmf"
-    with meshio.xdmf.TimeSeriesWriter(filename2) as writer:
-        writer.write_points_cells(pts, verts)
-        for i, h in enumerate(history):
-            F = h.INT.gridvec.components
-            u = (F @ pts.T).T - pts
+def _fields(history, X, pts):
+    """Point and cell data of the cube and its face-center points for all
+    steps of a columnar history, stored with the steps in the first axis."""
 
-            r = h.INT.force.components
-            t = h.INT.traction.components
+    F = history.gridvec.components
+    s = history.cauchy
 
-            rr = np.vstack((-r.T, r.T))
-            tt = np.vstack((-t.T, t.T))
-            writer.write_data(
-                i, point_data={"Displacement": u, "Reaction Force": rr, "Traction": tt}
-            )
+    r = np.swapaxes(history.force.components, -1, -2)
+    t = np.swapaxes(history.traction.components, -1, -2)
 
-    return
+    cube = {
+        "Displacement": np.einsum("nij,pj->npi", F, X) - X,
+        "Cauchy Stress": s[:, [0, 1, 2, 0, 1, 2], [0, 1, 2, 1, 2, 0]][:, None],
+        "Load-Proportionality-Factor (LPF)": history.lpf.reshape(-1, 1, 1),
+    }
+    points = {
+        "Displacement": np.einsum("nij,pj->npi", F, pts) - pts,
+        "Reaction Force": np.concatenate((-r, r), 1),
+        "Traction": np.concatenate((-t, t), 1),
+    }
+
+    return dict(cube=cube, points=points)
+
+
+# attribute types and centers of the fields
+_center = {
+    "Displacement": ("Vector", "Node"),
+    "Cauchy Stress": ("Tensor6", "Cell"),
+    "Load-Proportionality-Factor (LPF)": ("Scalar", "Cell"),
+    "Reaction Force": ("Vector", "Node"),
+    "Traction": ("Vector", "Node"),
+}
+
+
+def _meshes(h5, X, pts):
+    "Write the points and cells of the cube and its face-center points."
+    h5.create_group("cube")
+    h5.create_group("points")
+    h5["cube"]["geometry"] = X
+    h5["cube"]["topology"] = np.arange(8).reshape(1, 8)
+    h5["points"]["geometry"] = pts
+    h5["points"]["topology"] = np.arange(6).reshape(6, 1)
+
+
+def _items(h5, fields=None):
+    "Time-dependent datasets (or fields) of both meshes."
+    for mesh in ["cube", "points"]:
+        if fields is not None:
+            yield mesh, fields[mesh]
+        else:
+            yield mesh, {
+                name: value
+                for name, value in h5[mesh].items()
+                if name not in ["geometry", "topology"]
+            }
+
+
+def _write(h5, fields, start):
+    "Write fields of consecutive steps to the datasets."
+    for mesh, data in fields.items():
+        for name, value in data.items():
+            h5[mesh][name][start : start + len(value)] = value
+
+
+def _dataitem(dims, dtype, path):
+    "XDMF DataItem of a HDF5 dataset."
+    return (
+        '<DataItem DataType="{0}" Dimensions="{1}" Format="HDF" '
+        'Precision="{2}">{3}</DataItem>'
+    ).format(
+        "Int" if np.issubdtype(dtype, np.integer) else "Float",
+        " ".join(str(d) for d in dims),
+        np.dtype(dtype).itemsize,
+        path,
+    )
+
+
+def _xdmf(h5, mesh, steps, capacity):
+    "XDMF time-series of a mesh (without its tail)."
+
+    name = os.path.basename(h5.filename)
+    geometry = h5[mesh]["geometry"]
+    topology = h5[mesh]["topology"]
+    celltype = "Hexahedron" if mesh == "cube" else "Polyvertex"
+
+    return (
+        '<?xml version="1.0"?>\n'
+        '<Xdmf Version="3.0" xmlns:xi="http://www.w3.org/2001/XInclude">\n'
+        "  <Domain>\n"
+        '    <Grid Name="{0}" GridType="Uniform">\n'
+        '      <Geometry GeometryType="XYZ">{1}</Geometry>\n'
+        '      <Topology TopologyType="{2}" NumberOfElements="{3}" '
+        'NodesPerElement="{4}">{5}</Topology>\n'
+        "    </Grid>\n"
+        '    <Grid Name="TimeSeries" GridType="Collection" '
+        'CollectionType="Temporal">\n'
+    ).format(
+        mesh,
+        _dataitem(geometry.shape, geometry.dtype, name + ":/" + mesh + "/geometry"),
+        celltype,
+        topology.shape[0],
+        topology.shape[1],
+        _dataitem(topology.shape, topology.dtype, name + ":/" + mesh + "/topology"),
+    ) + _steps(
+        h5, mesh, steps, capacity
+    )
+
+
+def _steps(h5, mesh, steps, capacity):
+    "XDMF grids of time steps which refer to hyperslabs of the datasets."
+
+    # the template of a time step is created once and formatted per step
+    name = os.path.basename(h5.filename).replace("{", "{{").replace("}", "}}")
+    template = (
+        '      <Grid Name="step" GridType="Uniform">\n'
+        "        <xi:include xpointer=\"xpointer(//Grid[@Name='" + mesh + "']"
+        '/*[self::Topology or self::Geometry])" />\n'
+        '        <Time Value="{step}" />\n'
+    )
+
+    for field, data in dict(_items(h5))[mesh].items():
+        dims = (capacity,) + data.shape[1:]
+        attribute, center = _center[field]
+        template += (
+            '        <Attribute Name="{0}" AttributeType="{1}" Center="{2}">\n'
+            '          <DataItem ItemType="HyperSlab" Dimensions="{3}">\n'
+            '            <DataItem Dimensions="3 {4}" Format="XML">'
+            "{{step}} {5} {6} {7}</DataItem>\n"
+            "            {8}\n"
+            "          </DataItem>\n"
+            "        </Attribute>\n"
+        ).format(
+            field,
+            attribute,
+            center,
+            " ".join(str(d) for d in data.shape[1:]),
+            len(dims),
+            " ".join("0" for d in dims[1:]),
+            " ".join("1" for d in dims),
+            " ".join(str(d) for d in (1,) + dims[1:]),
+            _dataitem(dims, data.dtype, name + ":/" + mesh + "/" + field),
+        )
+
+    template += "      </Grid>\n"
+
+    return "".join([template.format(step=step) for step in steps])
+
+
+def _timeseries(h5, filename, nsteps, capacity):
+    "Write the XDMF files of all meshes with time-dependent datasets."
+    for mesh, data in _items(h5):
+        if data:
+            with open(filename + "_" + mesh + ".xdmf", "w") as f:
+                f.write(_xdmf(h5, mesh, range(nsteps), capacity) + _tail)
+
+
+_tail = "    </Grid>\n  </Domain>\n</Xdmf>\n"
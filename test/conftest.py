@@ -0,0 +1,35 @@
+import cubrium
+
+# built-in materials (matid, parameters)
+materials = [
+    (0, [1.0, 50.0]),
+    (1, [1.0, 50.0, 2]),
+    (1, [1.0, 50.0, 0]),
+    (2, [[1.0, 50.0, 2], [0.5, 3.0, -1]]),
+    (3, [0.4, 0.1, 0.02, -0.01, 0.01, 50.0]),
+    (4, [1.0, 50.0]),
+]
+
+
+def model(
+    matid=3,
+    parameters=[0.4, 0.1, 0.0, -0.01, 0.01, 5000.0],
+    loadcase="uniaxial",
+    backend="numpy",
+    tangent=None,
+):
+    """Updated model of a built-in material and a loadcase (name or function
+    of `cubrium.loadcase`), optionally without the analytic tangent."""
+
+    if isinstance(loadcase, str):
+        loadcase = getattr(cubrium.loadcase, loadcase)
+
+    MDL = cubrium.init(backend=backend)
+    MDL.GLO.constitution.matid = matid
+    MDL.GLO.constitution.parameters = parameters
+    MDL = cubrium.update(loadcase(MDL))
+
+    if tangent is not None:
+        MDL.GLO.constitution.tangent = tangent
+
+    return MDL
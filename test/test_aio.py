@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import model
+
+
+kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=10, verbose=False)
+
+
+@pytest.mark.parametrize("pool", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_aio(pool):
+    models = [
+        model(0, [1.0, 50.0], lc) for lc in ["uniaxial", "biaxial", "planarshear"] * 2
+    ]
+
+    async def requests(executor):
+        Res = await asyncio.gather(
+            *[cubrium.aio.solve(MDL, executor, **kwargs) for MDL in models]
+        )
+        Y = [np.array([res.x for res in R]) for R in Res]
+        history = await cubrium.aio.recover(Y[0], models[0], True, executor)
+        return Y, history
+
+    with pool(2) as executor:
+        Y, history = asyncio.run(requests(executor))
+
+    for MDL, y in zip(models, Y):
+        Res = cubrium.solve(MDL)(**kwargs)
+        assert np.allclose(y, [res.x for res in Res])
+
+    assert history.cauchy.shape == (11, 3, 3)
+
+
+@pytest.mark.parametrize("pool", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_aio_cancel(tmp_path, pool, monkeypatch):
+    MDL = model(0, [1.0, 50.0])
+    options = dict(kwargs, maxsteps=100000, dxmax=1e-4, dlpfmax=1e-4, maxscale=1.0)
+    filename = tmp_path / "checkpoint.npz"
+
+    # keep the cancellation flag of the solve
+    events = []
+    _event = cubrium.aio._event
+
+    def event(executor):
+        events.append(_event(executor))
+        return events[-1]
+
+    monkeypatch.setattr(cubrium.aio, "_event", event)
+
+    async def request(executor):
+        task = asyncio.ensure_future(
+            cubrium.aio.solve(MDL, executor, checkpoint=filename, **options)
+        )
+        await asyncio.sleep(0.5)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    executor = pool(1)
+    asyncio.run(request(executor))
+
+    # the running continuation stops after the current step, the executor
+    # does not wait for the remaining steps
+    executor.shutdown(wait=True)
+    assert len(events) == 1 and events[0].is_set()
+
+    Res = cubrium.solve(MDL)(resume=filename, **dict(options, maxsteps=0))
+    assert 1 < len(Res) < options["maxsteps"]
@@ -0,0 +1,85 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import materials
+
+
+@pytest.mark.parametrize("matid, parameters", materials)
+def test_umat_batch(matid, parameters):
+    umat = cubrium.constitution.umatdb(matid)
+
+    F = np.eye(3) + 0.1 * np.random.default_rng(5).standard_normal((4, 3, 3))
+
+    # stack of deformation gradients
+    P, A = umat(F, parameters, tangent=True)
+    for a in range(len(F)):
+        Pa, Aa = umat(F[a], parameters, tangent=True)
+        assert np.allclose(P[a], Pa)
+        assert np.allclose(A[a], Aa)
+
+    # grid of deformation gradients and material parameters
+    grid = np.array([parameters, parameters])
+    grid[1, ..., :2] *= 2
+
+    P = umat(F[:, None], grid[None])
+    assert P.shape == (4, 2, 3, 3)
+    assert np.allclose(P[:, 1], umat(F, grid[1]))
+
+
+def test_recover_columnar(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    MDL = cubrium.init()
+    MDL.GLO.constitution.matid = 3
+    MDL.GLO.constitution.parameters = [0.4, 0.1, 0.0, -0.01, 0.01, 5000]
+    MDL = cubrium.update(cubrium.loadcase.uniaxial(MDL))
+
+    Res = cubrium.solve(MDL)(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=5)
+    Y = np.array([res.x for res in Res])
+
+    history = cubrium.recover(Y, MDL)
+    columns = cubrium.recover(Y, MDL, columnar=True)
+
+    assert columns.cauchy.shape == (len(Y), 3, 3)
+    assert columns.force.normal.shape == (len(Y), 3)
+    assert columns.gridvec.components.shape == (len(Y), 3, 3)
+    assert np.allclose(columns.lpf, Y[:, -1])
+
+    stacked = cubrium.assembly.stack(history)
+
+    for a, b in [
+        (columns.cauchy, stacked.cauchy),
+        (columns.force.normal, stacked.force.normal),
+        (columns.traction.shear, stacked.traction.shear),
+        (columns.gridvec.volumeratio, stacked.gridvec.volumeratio),
+        (columns.H, stacked.H),
+        (columns.lpf, stacked.lpf),
+    ]:
+        assert np.allclose(a, b)
+
+    cubrium.writer.xdmf(columns, filename=MDL.GLO.title)
+    assert (tmp_path / "Uniaxial_cube.xdmf").exists()
+
+
+def test_recover_columnar_user():
+    def umat(F, parameters):
+        mu, K = parameters[:2]
+        E = (F.T @ F - np.eye(3)) / 2
+        return F @ (2 * mu * E + (K - 2 / 3 * mu) * np.trace(E) * np.eye(3))
+
+    MDL = cubrium.init()
+    MDL.GLO.constitution.umat = umat
+    MDL.GLO.constitution.parameters = [1.0, 50.0]
+    MDL = cubrium.update(cubrium.loadcase.biaxial(MDL))
+
+    Res = cubrium.solve(MDL)(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=5)
+    Y = np.array([res.x for res in Res])
+
+    columns = cubrium.recover(Y, MDL, columnar=True)
+    stacked = cubrium.assembly.stack(cubrium.recover(Y, MDL))
+
+    assert np.allclose(columns.cauchy, stacked.cauchy)
+    assert np.allclose(columns.force.normal, stacked.force.normal)
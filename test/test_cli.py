@@ -0,0 +1,119 @@
+import json
+
+import numpy as np
+
+import pytest
+
+import cubrium
+
+
+def test_cli(tmp_path, capsys):
+    manifest = {
+        "materials": [
+            {"name": "svk", "matid": 0, "parameters": [1.0, 50.0]},
+            {"name": "nh", "matid": 4, "parameters": [1.0, 50.0]},
+        ],
+        "loadcases": ["uniaxial", "biaxial"],
+        "options": {"maxsteps": 10, "control0": 10},
+        "jobs": [
+            {
+                "name": "targets",
+                "matid": 0,
+                "parameters": [1.0, 50.0],
+                "loadcase": "uniaxial",
+                "options": {"maxsteps": 40, "targets": [0.5, 1.0]},
+            },
+            # not enough material parameters
+            {"name": "failed", "matid": 0, "parameters": [1.0], "loadcase": "uniaxial"},
+        ],
+    }
+    filename = tmp_path / "manifest.json"
+    filename.write_text(json.dumps(manifest))
+
+    output = tmp_path / "results"
+    status = cubrium.cli.main([str(filename), "-o", str(output), "-p", "2"])
+
+    # the failed job is isolated
+    assert status == 1
+
+    with open(output / "summary.json") as f:
+        summary = json.load(f)
+
+    assert [s["name"] for s in summary] == [
+        "svk_uniaxial",
+        "svk_biaxial",
+        "nh_uniaxial",
+        "nh_biaxial",
+        "targets",
+        "failed",
+    ]
+    assert [s["steps"] for s in summary[:4]] == [11, 11, 11, 11]
+    assert all(s["error"] is None for s in summary[:5])
+    assert "Error" in summary[-1]["error"]
+    assert not (output / "failed").exists()
+
+    res = cubrium.results.load(str(output / "svk_biaxial"))
+    assert res.Y.shape == (11, 10)
+    assert res.GLO.title == "Biaxial"
+
+    res = cubrium.results.load(str(output / "targets"))
+    assert np.isclose(res.lpf[-1], 1.0)
+
+    out = capsys.readouterr().out
+    assert "[6/6]" in out
+    assert "5 of 6 jobs finished successfully" in out
+
+
+def test_cli_toml(tmp_path):
+    pytest.importorskip("h5py")
+
+    filename = tmp_path / "manifest.toml"
+    filename.write_text(
+        "\n".join(
+            [
+                'loadcases = ["planarshear"]',
+                "[[materials]]",
+                "matid = 0",
+                "parameters = [1.0, 50.0]",
+                "[options]",
+                "maxsteps = 5",
+                "[output]",
+                'path = "%s"' % (tmp_path / "out").as_posix(),
+                'format = "hdf5"',
+            ]
+        )
+    )
+
+    assert cubrium.cli.main([str(filename), "-p", "1", "-q"]) == 0
+    assert (tmp_path / "out" / "material0_planarshear.h5").exists()
+    assert (tmp_path / "out" / "material0_planarshear_cube.xdmf").exists()
+
+    # only public loadcase functions are accepted
+    for name in ["unknown", "np", "__name__"]:
+        with pytest.raises(ValueError):
+            cubrium.cli.jobs({"materials": [{"matid": 0}], "loadcases": [name]})
+
+    # job names are used as filenames in the output directory
+    for name in ["../x", "a/b", "a\\b", ".."]:
+        with pytest.raises(ValueError):
+            cubrium.cli.jobs({"jobs": [{"name": name, "loadcase": "uniaxial"}]})
+
+
+def test_cli_stopped(tmp_path):
+    manifest = {
+        "materials": [{"name": "svk", "matid": 0, "parameters": [1.0, 5000.0]}],
+        "loadcases": ["uniaxial"],
+        # the continuation stops early because the step width is not reduced
+        "options": {"maxsteps": 5, "control0": 10, "maxiter": 1, "minscale": 0.5},
+    }
+
+    output = tmp_path / "results"
+    res = cubrium.cli.run(manifest, output=str(output), processes=1, verbose=False)
+
+    with open(output / "summary.json") as f:
+        summary = json.load(f)
+
+    assert not res.success[0]
+    assert summary[0]["error"] == "Numerical continuation stopped."
+    assert summary[0]["steps"] < 6
+    assert not (output / "svk_uniaxial").exists()
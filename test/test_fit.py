@@ -0,0 +1,77 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import model
+
+
+def synthesize(parameters):
+    loadcases = [
+        (cubrium.loadcase.uniaxial, np.linspace(0.1, 2.0, 8)),
+        (cubrium.loadcase.biaxial, np.linspace(0.1, 1.0, 5)),
+        (cubrium.loadcase.planarshear, np.linspace(0.1, 1.5, 6)),
+    ]
+
+    experiments = []
+    for loadcase, x in loadcases:
+        MDL = model(3, parameters, loadcase)
+        experiments.append(cubrium.fit.experiment(MDL, x, np.zeros_like(x)))
+
+    # use the model response as experimental data
+    cubrium.fit.evaluate(parameters, experiments)
+    for exp in experiments:
+        exp.lpf = exp.Y[:, -1].copy()
+
+    return experiments
+
+
+def test_gradient():
+    parameters = np.array([0.4, 0.1, 0.0, -0.01, 0.01, 5000.0])
+    experiments = synthesize(parameters)
+    free = np.array([1, 1, 1, 1, 1, 0], dtype=bool)
+
+    r, J = cubrium.fit.evaluate(parameters, experiments, free=free, gradient=True)
+
+    assert np.allclose(r, 0)
+    assert J.shape == (len(r), 5)
+
+    h = 1e-6
+    Jh = []
+    for a in np.flatnonzero(free):
+        dp = np.zeros_like(parameters)
+        dp[a] = h
+        rp = cubrium.fit.evaluate(parameters + dp, experiments)
+        rm = cubrium.fit.evaluate(parameters - dp, experiments)
+        Jh.append((rp - rm) / (2 * h))
+
+    assert np.allclose(J, np.array(Jh).T, rtol=1e-5, atol=1e-8)
+
+    # the models keep their parameters
+    for exp in experiments:
+        assert np.allclose(exp.MDL.GLO.constitution.parameters, parameters)
+
+
+def test_identify():
+    parameters = np.array([0.4, 0.1, 0.0, -0.01, 0.01, 5000.0])
+    experiments = synthesize(parameters)
+
+    # start from scratch with frozen models
+    for exp in experiments:
+        exp.Y = None
+        exp.MDL = cubrium.freeze(exp.MDL)
+
+    free = np.array([1, 1, 0, 0, 0, 0], dtype=bool)
+    res = cubrium.fit.identify(
+        experiments, [0.3, 0.2, 0.0, -0.01, 0.01, 5000.0], free=free
+    )
+
+    assert res.success
+    assert np.allclose(res.parameters, parameters)
+    assert np.allclose(res.residuals, 0, atol=1e-8)
+
+
+if __name__ == "__main__":
+    test_gradient()
+    test_identify()
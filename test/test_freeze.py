@@ -0,0 +1,64 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import model
+
+
+def test_freeze():
+    MDL = model()
+    problem = cubrium.freeze(MDL)
+
+    with pytest.raises(AttributeError):
+        problem.GLO.constitution.parameters = [1.0, 5000.0]
+
+    with pytest.raises(ValueError):
+        problem.EXT.force.normal[0] = 2.0
+
+    assert not hasattr(problem, "INT")
+
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, maxsteps=10, verbose=False)
+    Y = np.array([res.x for res in cubrium.solve(MDL)(**kwargs)])
+
+    # a pickled problem is solved with the same results
+    problem = pickle.loads(pickle.dumps(problem))
+    assert np.allclose(np.array([res.x for res in cubrium.solve(problem)(**kwargs)]), Y)
+
+    # concurrent solves in threads share the problem
+    def run(i):
+        return np.array([res.x for res in cubrium.solve(problem)(**kwargs)])
+
+    with ThreadPoolExecutor(4) as pool:
+        for y in pool.map(run, range(8)):
+            assert np.allclose(y, Y)
+
+
+def test_system():
+    MDL = model()
+    INT = MDL.INT
+
+    # the model is not modified, new states are returned
+    res, state = cubrium.assembly.system(np.zeros(9), 0.3, MDL)
+
+    assert MDL.INT is INT
+    assert np.all(np.isnan(MDL.INT.force.normal))
+    assert not hasattr(MDL.EXT, "lpf")
+    assert state.EXT.lpf == 0.3
+    assert state.GLO is MDL.GLO
+
+    Y = np.zeros((2, 10))
+    Y[1, 0] = 0.1
+    states = cubrium.recover(Y, cubrium.freeze(MDL))
+
+    assert states[0].INT is not states[1].INT
+    assert not np.allclose(states[0].INT.force.normal, states[1].INT.force.normal)
+
+
+if __name__ == "__main__":
+    test_freeze()
+    test_system()
@@ -0,0 +1,23 @@
+import numpy as np
+
+import cubrium
+
+
+def test_helpers():
+    a, b = np.arange(1.0, 4.0), np.arange(4.0, 7.0)
+    A = np.arange(9.0).reshape(3, 3)
+    B = A.T + np.eye(3)
+    I4 = cubrium.helpers.cdya(np.eye(3), np.eye(3))
+
+    # general tensors
+    assert np.allclose(cubrium.helpers.dya(a, b), np.outer(a, b))
+    assert np.allclose(cubrium.helpers.ddot(I4, A), (A + A.T) / 2)
+    assert np.allclose(cubrium.helpers.ddot(A, B), np.sum(A * B))
+
+    # stacks of second-order tensors
+    AA = np.stack([A, B])
+    assert np.allclose(cubrium.helpers.ddot33(AA, B), [np.sum(A * B), np.sum(B * B)])
+    assert np.allclose(
+        cubrium.helpers.dya33(AA, A),
+        [cubrium.helpers.dya(A, A), cubrium.helpers.dya(B, A)],
+    )
@@ -0,0 +1,129 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+import contique
+
+from cubrium import hyperdual as hd
+
+
+def W_svk(F, p):
+    mu, K = p[..., 0], p[..., 1]
+    E = (F.T @ F - np.eye(3)) / 2
+    return mu * hd.trace(E @ E) + (K - 2 / 3 * mu) / 2 * hd.trace(E) ** 2
+
+
+def W_tod(I1, I2, J, p):
+    C10, C01, C11, C20, C30, K = [p[..., a] for a in range(6)]
+    I1u = J ** (-2 / 3) * I1 - 3
+    I2u = J ** (-4 / 3) * I2 - 3
+    return (
+        C10 * I1u
+        + C01 * I2u
+        + C11 * I1u * I2u
+        + C20 * I1u ** 2
+        + C30 * I1u ** 3
+        + K / 2 * (J - 1) ** 2
+    )
+
+
+def W_ogden(F, p):
+    mu, alpha, K = p[..., 0], p[..., 1], p[..., 2]
+    J = hd.det(F)
+    I1 = J ** (-2 / 3) * hd.trace(F.T @ F)
+    return mu / alpha * (hd.exp(alpha * (I1 - 3)) - 1) + K / 2 * hd.log(J) ** 2
+
+
+F = np.eye(3) + 0.1 * np.random.default_rng(7).standard_normal((5, 3, 3))
+
+
+@pytest.mark.parametrize(
+    "W, invariants, umat, parameters",
+    [
+        (W_svk, False, cubrium.constitution.umat_svk, [1.0, 50.0]),
+        (
+            W_tod,
+            True,
+            cubrium.constitution.umat_tod,
+            [0.4, 0.1, 0.02, -0.01, 0.01, 50.0],
+        ),
+    ],
+)
+def test_hyperelastic(W, invariants, umat, parameters):
+    umat_ad = cubrium.constitution.hyperelastic(W, invariants=invariants)
+
+    P, A = umat_ad(F, parameters, tangent=True)
+    P_ref, A_ref = umat(F, parameters, tangent=True)
+
+    assert np.allclose(umat_ad(F, parameters), P_ref)
+    assert np.allclose(P, P_ref)
+    assert np.allclose(A, A_ref)
+
+
+def test_hyperelastic_finite_differences():
+    umat = cubrium.constitution.hyperelastic(W_ogden)
+    parameters = [0.5, 1.5, 20.0]
+
+    for Fa in F:
+        P, A = umat(Fa, parameters, tangent=True)
+        dPdF = contique.jacobian(umat, h=1e-6, mode=3)(Fa, parameters)
+
+        assert np.allclose(A, dPdF, rtol=1e-6, atol=1e-6)
+
+
+def test_register():
+    umat = cubrium.constitution.hyperelastic(W_tod, invariants=True)
+    cubrium.constitution.register(10, umat)
+
+    Y = []
+    for matid in [3, 10]:
+        MDL = cubrium.init()
+        MDL.GLO.constitution.matid = matid
+        MDL.GLO.constitution.parameters = [0.4, 0.1, 0.0, -0.01, 0.01, 5000.0]
+        MDL = cubrium.update(cubrium.loadcase.uniaxial(MDL))
+
+        assert MDL.GLO.constitution.tangent
+
+        Res = cubrium.solve(MDL)(
+            x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=5, tol=1e-10
+        )
+        Y.append(np.array([res.x for res in Res]))
+
+    assert np.allclose(*Y)
+
+    with pytest.raises(ValueError):
+        cubrium.constitution.register(3, umat)
+
+
+def test_register_plain():
+    def umat(F, parameters):
+        mu, K = parameters[:2]
+        E = (F.T @ F - np.eye(3)) / 2
+        return F @ (2 * mu * E + (K - 2 / 3 * mu) * np.trace(E) * np.eye(3))
+
+    cubrium.constitution.register(11, umat)
+
+    Y = []
+    for matid in [0, 11]:
+        MDL = cubrium.init()
+        MDL.GLO.constitution.matid = matid
+        MDL.GLO.constitution.parameters = [1.0, 50.0]
+        MDL = cubrium.update(cubrium.loadcase.biaxial(MDL))
+
+        # a plain umat is differentiated by finite-differences
+        assert MDL.GLO.constitution.tangent == (matid == 0)
+
+        Res = cubrium.solve(MDL)(
+            x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=5, verbose=False
+        )
+        Y.append(np.array([res.x for res in Res]))
+
+    assert np.allclose(*Y)
+
+
+if __name__ == "__main__":
+    test_hyperelastic(W_svk, False, cubrium.constitution.umat_svk, [1.0, 50.0])
+    test_hyperelastic_finite_differences()
+    test_register()
+    test_register_plain()
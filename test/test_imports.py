@@ -0,0 +1,32 @@
+import sys
+import subprocess
+
+import pytest
+
+import cubrium
+
+
+def test_lazy_imports():
+    code = (
+        "import sys, cubrium; "
+        "print(' '.join(m for m in ['numba', 'meshio', 'h5py', 'contique', "
+        "'multiprocessing', 'cubrium.writer'] if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    # no heavy dependencies are imported by the package
+    assert out.stdout.strip() == ""
+
+    # lazy modules and functions are imported on first access
+    assert "writer" in dir(cubrium)
+    assert cubrium.writer.xdmf is not None
+    assert cubrium.sweep is cubrium.parallel.sweep
+
+    with pytest.raises(AttributeError):
+        cubrium.undefined
+
+
+if __name__ == "__main__":
+    test_lazy_imports()
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import model
+
+
+def test_profile():
+    MDL = model(0, [1.0, 5000.0])
+    umat = MDL.GLO.constitution.umat
+    equilibrium = cubrium.assembly.equilibrium
+
+    with cubrium.instrument.profile(MDL) as report:
+        Res = cubrium.solve(MDL)(
+            x0=np.zeros(9), lpf0=0.0, maxsteps=10, dxmax=2, dlpfmax=5, verbose=False
+        )
+
+    # the accepted steps do not include the evaluations of rejected solves
+    assert report.calls["assembly.equilibrium"] > sum([res.nfev for res in Res])
+    assert report.calls["assembly.jacobian"] > sum([res.njev for res in Res])
+    assert report.calls["umat.umat_svk"] == (
+        report.calls["assembly.equilibrium"] + report.calls["assembly.jacobian"]
+    )
+    assert report.iterations >= sum([res.niterations for res in Res])
+    assert report.rejections > 0
+    assert report.time["assembly.equilibrium"] > 0
+
+    assert "umat.umat_svk" in cubrium.instrument.summary(report)
+
+    # neither the model nor the package are modified
+    assert MDL.GLO.constitution.umat is umat
+    assert cubrium.solver.equilibrium is equilibrium
+
+    # nothing is recorded outside of the context
+    calls = dict(report.calls)
+    cubrium.assembly.equilibrium(np.zeros(9), 0.0, MDL)
+    assert report.calls == calls
+
+
+def test_profile_frozen():
+    problem = cubrium.freeze(model(0, [1.0, 5000.0]))
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, maxsteps=5, verbose=False)
+
+    with cubrium.instrument.profile(problem) as report:
+        # calls in other threads are not recorded
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(cubrium.solve(problem), **kwargs).result()
+        assert report.calls["assembly.equilibrium"] == 0
+
+        Res = cubrium.solve(problem)(**kwargs)
+
+    assert report.calls["assembly.equilibrium"] >= sum([res.nfev for res in Res])
+    assert report.calls["umat.umat_svk"] > 0
+
+
+def test_profile_failure():
+    MDL = model(0, [1.0, 5000.0])
+    umat = MDL.GLO.constitution.umat
+
+    with pytest.raises(ZeroDivisionError):
+        with cubrium.instrument.profile(MDL) as report:
+            cubrium.assembly.equilibrium(np.zeros(9), 0.0, MDL)
+            1 / 0
+
+    assert report.calls["assembly.equilibrium"] == 1
+    assert MDL.GLO.constitution.umat is umat
+    assert cubrium.instrument._report.get() is None
+
+
+if __name__ == "__main__":
+    test_profile()
+    test_profile_frozen()
+    test_profile_failure()
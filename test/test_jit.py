@@ -0,0 +1,79 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import materials, model
+
+pytest.importorskip("numba")
+
+
+loadcases = [
+    cubrium.loadcase.uniaxial,
+    cubrium.loadcase.biaxial,
+    cubrium.loadcase.planarshear,
+    cubrium.loadcase.simpleshear,
+    cubrium.loadcase.simpleshearfree3,
+    cubrium.loadcase.simpleshearfree2free3,
+]
+
+
+@pytest.mark.parametrize("matid, parameters", materials)
+def test_jit_umat(matid, parameters):
+    umat = cubrium.constitution.umatdb(matid)
+    umat_jit = getattr(cubrium.jit, umat.__name__)
+
+    F = np.eye(3) + 0.1 * np.random.default_rng(5).standard_normal((4, 3, 3))
+
+    assert np.allclose(umat_jit(F, parameters), umat(F, parameters))
+    assert np.allclose(umat_jit(F[0], parameters), umat(F[0], parameters))
+
+
+@pytest.mark.parametrize("matid, parameters", materials)
+def test_jit_equilibrium(matid, parameters):
+    H = 0.1 * np.random.default_rng(6).standard_normal((4, 9))
+    lpf = np.linspace(0, 1, 4)
+
+    for lcase in loadcases:
+        MDL = model(matid, parameters, lcase, backend="numba")
+        MDL_np = model(matid, parameters, lcase)
+
+        assert MDL.GLO.kernel is not None
+        assert MDL_np.GLO.kernel is None
+
+        res = cubrium.assembly.equilibrium(H, lpf, MDL)
+        res_np = cubrium.assembly.equilibrium(H, lpf, MDL_np)
+
+        assert np.allclose(res, res_np)
+        assert np.allclose(cubrium.assembly.equilibrium(H[0], lpf[0], MDL), res_np[0])
+
+
+def test_jit_solve():
+    MDL = model(*materials[4], backend="numba")
+    MDL_np = model(*materials[4])
+
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=10, tol=1e-10)
+
+    Y = np.array([res.x for res in cubrium.solve(MDL)(**kwargs)])
+    Y_np = np.array([res.x for res in cubrium.solve(MDL_np)(**kwargs)])
+
+    assert np.allclose(Y, Y_np)
+
+
+def test_jit_user_umat():
+    MDL = cubrium.init(backend="numba")
+    MDL.GLO.constitution.umat = lambda F, p: cubrium.constitution.umat_svk(F, p)
+    MDL.GLO.constitution.parameters = [1.0, 50.0]
+    MDL = cubrium.update(cubrium.loadcase.uniaxial(MDL))
+
+    # user materials are evaluated by NumPy
+    assert MDL.GLO.kernel is None
+
+
+if __name__ == "__main__":
+    for matid, parameters in materials:
+        test_jit_umat(matid, parameters)
+        test_jit_equilibrium(matid, parameters)
+    test_jit_solve()
+    test_jit_user_umat()
@@ -0,0 +1,40 @@
+import numpy as np
+
+import cubrium
+
+
+def test_plan():
+    MDL = cubrium.init()
+    MDL.GLO.constitution.matid = 0
+    MDL.GLO.constitution.parameters = [1.0, 50.0]
+    MDL = cubrium.update(cubrium.loadcase.uniaxial(MDL))
+
+    plan = MDL.GLO.plan
+
+    assert len(plan.index) == MDL.GLO.ndof
+    assert plan.names[0] == "force.normal[0]"
+    assert plan.names[-1] == "gridvec.symmetry[2]"
+    assert plan.force and not plan.traction and plan.gridvec
+    assert plan.items == [0, 3, 36]
+
+    # only the external normal force on surface 1 is scaled by the lpf
+    assert np.allclose(plan.scaled, [1, 0, 0, 0, 0, 0, 0, 0, 0])
+    assert np.allclose(plan.fixed, 0)
+
+    # residuals of all DOFs in the order of the plan
+    H = np.zeros(9)
+    H[0] = 0.1
+    F = cubrium.kinematics.defgrd(H)
+    P = MDL.GLO.constitution.umat(F, MDL.GLO.constitution.parameters)
+    fn = cubrium.kinetics.force(P, MDL.GLO.cube.edges, MDL.GLO.cube.areas)[1]
+
+    res = cubrium.assembly.equilibrium(H, 0.3, MDL)
+    assert np.allclose(res[:3], np.array([0.3, 0, 0]) - fn)
+    assert np.allclose(res[3:], 0)
+
+    # the jacobian w.r.t. the lpf is the scaled part of the external values
+    assert np.allclose(cubrium.assembly.jacobian_lpf(H, 0.3, MDL), plan.scaled)
+
+
+if __name__ == "__main__":
+    test_plan()
@@ -0,0 +1,59 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+
+
+def test_results(tmp_path):
+    MDL = cubrium.init()
+    MDL.GLO.constitution.matid = 0
+    MDL.GLO.constitution.parameters = [1.0, 5000.0]
+    MDL = cubrium.update(cubrium.loadcase.biaxial(MDL))
+
+    Res = cubrium.solve(MDL)(x0=np.zeros(9), lpf0=0.0, maxsteps=10, verbose=False)
+    Y = np.array([res.x for res in Res])
+    history = cubrium.recover(Y, MDL, columnar=True)
+
+    cubrium.results.save(tmp_path / "biaxial", Y, MDL)
+    res = cubrium.results.load(tmp_path / "biaxial")
+
+    # arrays are memory-mapped on first access
+    assert "cauchy" not in vars(res)
+    assert isinstance(res.cauchy, np.memmap)
+    assert "force" not in vars(res)
+
+    assert np.allclose(res.Y, Y)
+    assert np.allclose(res.lpf, history.lpf)
+    assert np.allclose(res.cauchy[5], history.cauchy[5])
+    assert np.allclose(res.force.normal, history.force.normal)
+    assert np.allclose(res.gridvec.volumeratio, history.gridvec.volumeratio)
+
+    with pytest.raises(AttributeError):
+        res.stress
+
+    # the re-created model is solved with the same results
+    MDL2 = cubrium.results.model(tmp_path / "biaxial")
+    assert MDL2.GLO.title == MDL.GLO.title
+    assert MDL2.GLO.lpftype == MDL.GLO.lpftype
+
+    Res2 = cubrium.solve(MDL2)(x0=np.zeros(9), lpf0=0.0, maxsteps=10, verbose=False)
+    assert np.allclose(np.array([res.x for res in Res2]), Y)
+
+    # loaded results are accepted by the writer
+    cubrium.writer.hdf5(res, str(tmp_path / "biaxial"))
+    assert (tmp_path / "biaxial_cube.xdmf").exists()
+
+
+def test_results_user_umat(tmp_path):
+    MDL = cubrium.init()
+    MDL.GLO.constitution.umat = cubrium.constitution.umat_svk
+    MDL.GLO.constitution.parameters = [1.0, 5000.0]
+    MDL = cubrium.update(cubrium.loadcase.biaxial(MDL))
+
+    cubrium.results.save(tmp_path / "user", np.zeros((1, 10)), MDL)
+
+    # the umat of a user material is not stored
+    MDL2 = cubrium.results.model(tmp_path / "user")
+    assert MDL2.GLO.constitution.umat is None
+    assert not MDL2.GLO.constitution.tangent
@@ -0,0 +1,243 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import model
+
+
+@pytest.mark.parametrize("tangent", [True, False])
+def test_continuation(tangent):
+    MDL = model(tangent=tangent)
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=20, tol=1e-10)
+
+    Res = cubrium.solve(MDL)(**kwargs)
+    Res_ref = cubrium.solve(MDL, engine="contique")(**kwargs)
+
+    Y = np.array([res.x for res in Res])
+    Y_ref = np.array([res.x for res in Res_ref])
+
+    assert len(Res) == 21
+    assert np.all([res.success for res in Res])
+    assert not np.any([res.stopped for res in Res])
+    assert np.all(np.diff(Y[:, -1]) > 0)
+
+    # adaptive step widths are greater than the fixed ones
+    assert Y[-1, -1] > Y_ref[-1, -1]
+
+    # all states are in equilibrium and on the path of the reference solution
+    for res in Res:
+        assert np.linalg.norm(res.fun) < 1e-10
+
+    lpf = Y[:, -1] <= Y_ref[-1, -1]
+    assert np.allclose(
+        np.interp(Y[lpf, -1], Y_ref[:, -1], Y_ref[:, 0]), Y[lpf, 0], atol=1e-3
+    )
+
+
+def test_continuation_bisection():
+    MDL = model()
+
+    # the first step does not converge with the initial step width
+    Res = cubrium.solve(MDL)(
+        x0=np.zeros(9),
+        lpf0=0.0,
+        control0=10,
+        dxmax=2.0,
+        dlpfmax=5.0,
+        maxsteps=3,
+        maxiter=8,
+    )
+
+    assert len(Res) == 4
+    assert Res[1].scale < 1
+
+
+def test_batch():
+    models = [model(), model(tangent=False), model()]
+    models[2].GLO.constitution.parameters = [0.8, 0.2, 0.0, -0.01, 0.01, 5000.0]
+
+    # a umat which accepts a single F only
+    models.append(model(tangent=False))
+    models[3].GLO.constitution.umat = lambda F, p: models[0].GLO.constitution.umat(
+        F.reshape(3, 3), p
+    )
+
+    res = cubrium.solver.batch(models, control0=10, maxsteps=10, tol=1e-10)
+
+    assert np.all(res.success)
+    assert np.all(res.steps == 11)
+    assert np.allclose(res.Y[3], res.Y[1])
+
+    for MDL, Y in zip(models, res.Y):
+        assert np.allclose(cubrium.assembly.equilibrium(Y[:, :-1], Y[:, -1], MDL), 0)
+
+
+def test_checkpoint(tmp_path, monkeypatch):
+    MDL = model()
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, verbose=False)
+    filename = tmp_path / "checkpoint.npz"
+
+    Res_ref = cubrium.solve(MDL)(maxsteps=12, **kwargs)
+
+    # interrupt the continuation by an exception in the callback
+    def interrupt(res):
+        if res.x[-1] > Res_ref[7].x[-1] - 1e-8:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        cubrium.solve(MDL)(
+            maxsteps=12, checkpoint=filename, nsave=3, callback=interrupt, **kwargs
+        )
+
+    Res = cubrium.solve(MDL)(maxsteps=5, resume=filename, checkpoint=filename, **kwargs)
+
+    Y = np.array([res.x for res in Res])
+    Y_ref = np.array([res.x for res in Res_ref])
+
+    assert len(Res) == len(Res_ref)
+    assert np.allclose(Y, Y_ref)
+    assert [res.niterations for res in Res] == [res.niterations for res in Res_ref]
+
+    # the checkpoint contains all converged steps
+    Res = cubrium.solve(MDL)(maxsteps=0, resume=filename, **kwargs)
+    assert np.allclose([res.x for res in Res], Y_ref)
+
+    # by default, the checkpoint is saved once when the continuation stops
+    saved = []
+    save = cubrium.solver._save
+    monkeypatch.setattr(
+        cubrium.solver, "_save", lambda *args: saved.append(save(*args))
+    )
+    cubrium.solve(MDL)(maxsteps=12, checkpoint=filename, **kwargs)
+    assert len(saved) == 1
+
+
+def test_targets():
+    MDL = model()
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, verbose=False)
+
+    # load-proportionality-factors
+    Res = cubrium.solve(MDL)(targets=[0.01, 0.05, 0.3], **kwargs)
+    Y = np.array([res.x for res in Res])
+    events = np.array([res.event for res in Res])
+
+    assert np.allclose(Y[events >= 0, -1], [0.01, 0.05, 0.3])
+    assert np.all(events[events >= 0] == [0, 1, 2])
+    assert Y[-1, -1] == 0.3
+
+    # stretches (of the displacement gradient component H[0, 0])
+    stretch = np.array([1.1, 1.5])
+    Res = cubrium.solve(MDL)(targets=stretch - 1, component=1, **kwargs)
+    assert np.allclose([res.x[0] + 1 for res in Res if res.event >= 0], stretch)
+
+    # event function of the recovered state
+    def cauchy(H, lpf, MDL):
+        return cubrium.assembly.system(H, lpf, MDL)[1].INT.cauchy[0, 0] - 0.2
+
+    Res = cubrium.solve(MDL)(targets=[cauchy], tol=1e-10, **kwargs)
+    assert Res[-1].event == 0
+    assert np.isclose(cauchy(Res[-1].x[:-1], Res[-1].x[-1], MDL), 0)
+    assert np.allclose(
+        cubrium.assembly.equilibrium(Res[-1].x[:-1], Res[-1].x[-1], MDL), 0
+    )
+
+
+@pytest.mark.parametrize("tangent", [True, False])
+def test_prescribed(tangent):
+    MDL = model(tangent=tangent)
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=1, verbose=False)
+    stretch = np.linspace(1.01, 1.5, 20)
+
+    # displacement gradient component
+    Y = cubrium.prescribed(MDL, stretch - 1, component=0)
+    Res = cubrium.solve(MDL)(targets=stretch - 1, component=1, **kwargs)
+    Y_ref = np.array([res.x for res in Res if res.event >= 0])
+
+    assert Y.shape == (20, 10)
+    assert np.allclose(Y, Y_ref)
+    assert np.allclose(cubrium.assembly.equilibrium(Y[:, :-1], Y[:, -1], MDL), 0)
+
+    # length of a gridvector (equal to the stretch in uniaxial tension)
+    Y = cubrium.prescribed(MDL, stretch, component="gridvec.length[0]")
+    assert np.allclose(Y, Y_ref)
+
+    # warm-start from previous states
+    assert np.allclose(cubrium.prescribed(MDL, stretch - 1, Y0=Y + 0.01), Y_ref)
+
+    with pytest.raises(ValueError):
+        cubrium.prescribed(MDL, stretch, component="gridvec.volumeratio")
+
+
+@pytest.mark.parametrize("tangent", [True, False])
+def test_critical(tangent):
+    MDL = cubrium.init()
+    MDL.GLO.constitution.matid = 3
+    MDL.GLO.constitution.parameters = [0.4, 0.1, 0.0, -0.01, 0.0, 5000.0]
+    MDL = cubrium.update(cubrium.loadcase.uniaxial(MDL))
+    MDL.GLO.constitution.tangent = tangent
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, tol=1e-10, verbose=False)
+
+    Res = cubrium.solve(MDL)(maxsteps=40, critical=True, **kwargs)
+    critical = [res for res in Res if res.critical]
+
+    # maximum of the lpf of a densely stepped path (dxmax=dlpfmax=0.002)
+    lpfmax = 1.7379804056
+
+    assert len(critical) == 1
+    assert critical[0].critical == "limit"
+    assert np.isclose(critical[0].x[-1], lpfmax, rtol=1e-6)
+    assert max(res.x[-1] for res in Res) == critical[0].x[-1]
+
+    # the jacobian is singular at the critical point
+    x, lpf = critical[0].x[:-1], critical[0].x[-1]
+    assert np.allclose(cubrium.assembly.equilibrium(x, lpf, MDL), 0)
+    s = np.linalg.svd(cubrium.assembly.jacobian(x, lpf, MDL), compute_uv=False)
+    assert s[-1] / s[0] < 1e-7
+
+
+def test_user_umat():
+    def umat_svk(F, parameters):
+        mu, K = parameters[:2]
+        E = (F.T @ F - np.eye(3)) / 2
+        return F @ (2 * mu * E + (K - 2 / 3 * mu) * np.trace(E) * np.eye(3))
+
+    MDL = cubrium.init()
+    MDL.GLO.constitution.umat = umat_svk
+    MDL.GLO.constitution.parameters = [1.0, 5000.0]
+    MDL = cubrium.update(cubrium.loadcase.uniaxial(MDL))
+
+    MDL_ref = cubrium.init()
+    MDL_ref.GLO.constitution.matid = 0
+    MDL_ref.GLO.constitution.parameters = [1.0, 5000.0]
+    MDL_ref = cubrium.update(cubrium.loadcase.uniaxial(MDL_ref))
+    MDL_ref.GLO.constitution.tangent = False
+
+    # a single-F umat is called once per deformation gradient of the
+    # finite-difference jacobian
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=10, verbose=False)
+    Y = np.array([res.x for res in cubrium.solve(MDL)(**kwargs)])
+    Y_ref = np.array([res.x for res in cubrium.solve(MDL_ref)(**kwargs)])
+
+    assert np.allclose(Y, Y_ref)
+    assert np.allclose(cubrium.prescribed(MDL, Y[1:, 0]), Y[1:], atol=1e-6)
+
+
+def test_engine():
+    with pytest.raises(ValueError):
+        cubrium.solve(model(), engine="unknown")
+
+
+if __name__ == "__main__":
+    test_continuation(True)
+    test_continuation(False)
+    test_continuation_bisection()
+    test_batch()
+    test_targets()
+    test_prescribed(True)
+    test_prescribed(False)
+    test_critical(True)
+    test_critical(False)
+    test_user_umat()
+    test_engine()
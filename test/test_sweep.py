@@ -0,0 +1,114 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+
+
+def test_sweep():
+    jobs = cubrium.parallel.grid(
+        matid=0,
+        parameters=[[1.0, 5000.0], [2.0, 5000.0]],
+        loadcases=["uniaxial", cubrium.loadcase.biaxial],
+        control0=10,
+        maxsteps=4,
+    )
+
+    # user material defined by a (non-picklable) lambda function
+    jobs.append(
+        dict(
+            umat=lambda F, p: cubrium.constitution.umat_svk(F, p),
+            parameters=[1.0, 5000.0],
+            loadcase="uniaxial",
+            options=dict(control0=10, maxsteps=4),
+        )
+    )
+
+    res = cubrium.sweep(jobs, processes=2)
+
+    assert np.all(res.success)
+    assert np.all(res.steps == 5)
+    assert len(res.table) == 5 * len(jobs)
+
+    # compare with a serial solution
+    MDL = cubrium.parallel.model(jobs[2])
+    Res = cubrium.solve(MDL)(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=4)
+    Y = np.array([r.x for r in Res])
+
+    assert np.allclose(res.Y[2], Y)
+    assert np.allclose(res.Y[-1], res.Y[0])
+    assert np.allclose(res.table[res.table["job"] == 2]["lpf"], Y[:, -1])
+
+
+def test_sweep_error():
+    jobs = [dict(matid=0, parameters=[1.0, 5000.0], loadcase="unknown")]
+
+    res = cubrium.sweep(jobs, processes=1)
+
+    assert not res.success[0]
+    assert "unknown" in res.error[0]
+    assert len(res.table) == 0
+
+
+def test_sweep_verbose(capsys):
+    jobs = [dict(matid=0, parameters=[1.0, 5000.0], loadcase="uniaxial")]
+
+    cubrium.sweep(jobs, processes=1, maxsteps=2)
+    assert capsys.readouterr().out == ""
+
+    cubrium.sweep(jobs, processes=1, maxsteps=2, verbose=True)
+    assert "Success" in capsys.readouterr().out
+
+
+def test_sweep_stopped():
+    # the continuation stops early because the step width is not reduced
+    jobs = cubrium.parallel.grid(
+        matid=0,
+        parameters=[[1.0, 5000.0]],
+        loadcases=["uniaxial"],
+        control0=10,
+        maxsteps=5,
+        maxiter=1,
+        minscale=0.5,
+    )
+
+    res = cubrium.sweep(jobs, processes=1)
+    ref = cubrium.lockstep(jobs)
+
+    assert res.steps[0] < 6
+    assert not res.success[0]
+    assert list(res.success) == list(ref.success)
+    assert res.error == ref.error
+
+
+def test_lockstep():
+    jobs = cubrium.parallel.grid(
+        matid=0,
+        parameters=[[1.0, 5000.0], [2.0, 5000.0]],
+        loadcases=["uniaxial", "biaxial", "simpleshear"],
+        control0=10,
+        maxsteps=10,
+        tol=1e-10,
+    )
+    jobs.append(
+        dict(
+            matid=3,
+            parameters=[0.4, 0.1, 0.0, -0.01, 0.01, 5000.0],
+            loadcase="planarshear",
+            options=jobs[0]["options"],
+        )
+    )
+
+    res = cubrium.lockstep(jobs)
+
+    assert np.all(res.success)
+    assert np.all(res.steps == 11)
+    assert len(res.table) == 11 * len(jobs)
+
+    # all states are in equilibrium
+    for job, Y in zip(jobs, res.Y):
+        MDL = cubrium.parallel.model(job)
+        assert np.allclose(cubrium.assembly.equilibrium(Y[:, :-1], Y[:, -1], MDL), 0)
+
+    with pytest.raises(ValueError):
+        cubrium.lockstep([jobs[0], dict(jobs[1], options={})])
@@ -0,0 +1,104 @@
+import numpy as np
+
+import pytest
+
+import cubrium
+
+from conftest import materials, model
+import contique
+
+
+loadcases = [
+    cubrium.loadcase.uniaxial,
+    cubrium.loadcase.biaxial,
+    cubrium.loadcase.planarshear,
+    cubrium.loadcase.simpleshear,
+    cubrium.loadcase.simpleshearfree3,
+    cubrium.loadcase.simpleshearfree2free3,
+]
+
+
+@pytest.mark.parametrize("matid, parameters", materials)
+def test_umat_tangent(matid, parameters):
+    umat = cubrium.constitution.umatdb(matid)
+
+    for F in [np.eye(3), np.diag([1.2, 0.9, 0.9]), np.eye(3) + 0.1 * np.ones((3, 3))]:
+        P, A = umat(F, parameters, tangent=True)
+        dPdF = contique.jacobian(umat, h=1e-6, mode=3)(F, parameters)
+
+        assert np.allclose(P, umat(F, parameters))
+        assert np.allclose(A, dPdF, rtol=1e-6, atol=1e-6)
+
+
+def test_ksvk_multi():
+    parameters = [[1.0, 50.0, 2], [0.5, 3.0, -1], [0.2, 0.0, 0]]
+
+    for F in [np.eye(3), np.diag([1.2, 0.9, 0.9]), np.eye(3) + 0.1 * np.ones((3, 3))]:
+        P, A = cubrium.constitution.umat_ksvk_multi(F, parameters, tangent=True)
+        res = [cubrium.constitution.umat_ksvk(F, p, tangent=True) for p in parameters]
+
+        assert np.allclose(P, sum(r[0] for r in res))
+        assert np.allclose(A, sum(r[1] for r in res))
+
+
+@pytest.mark.parametrize("matid, parameters", materials)
+def test_system_jacobian(matid, parameters):
+    H = 0.1 * np.arange(1, 10) / 9
+    lpf = 0.3
+
+    for lcase in loadcases:
+        MDL = model(matid, parameters, lcase)
+
+        dRdH = contique.jacobian(cubrium.assembly.equilibrium, 0, 1e-6, 3)
+        dRdl = contique.jacobian(cubrium.assembly.equilibrium, 1, 1e-6, 3)
+
+        assert np.allclose(
+            cubrium.assembly.jacobian(H, lpf, MDL),
+            dRdH(H, lpf, MDL),
+            rtol=1e-6,
+            atol=1e-6,
+        )
+        assert np.allclose(
+            cubrium.assembly.jacobian_lpf(H, lpf, MDL), dRdl(H, lpf, MDL)
+        )
+
+
+def test_solve_tangent():
+    MDL = model(3, [0.4, 0.1, 0.0, -0.01, 0.01, 5000])
+
+    kwargs = dict(x0=np.zeros(9), lpf0=0.0, control0=10, maxsteps=10, tol=1e-10)
+
+    Res = cubrium.solve(MDL)(**kwargs)
+
+    MDL.GLO.constitution.tangent = False
+    Res_fd = cubrium.solve(MDL)(jacmode=3, jaceps=1e-4, **kwargs)
+
+    Y = np.array([res.x for res in Res])
+    Y_fd = np.array([res.x for res in Res_fd])
+
+    assert np.allclose(Y, Y_fd)
+
+
+def test_vectorize():
+    def umat(F, parameters, tangent=False):
+        assert F.shape == (3, 3)
+        return cubrium.constitution.umat_svk(F, parameters, tangent)
+
+    parameters = [1.0, 50.0]
+    F = np.eye(3) + 0.1 * np.arange(18).reshape(2, 1, 3, 3) / 18
+
+    stacked = cubrium.constitution.vectorize(umat)
+    P, A = stacked(F, parameters, tangent=True)
+    P_ref, A_ref = cubrium.constitution.umat_svk(F, parameters, tangent=True)
+
+    assert np.allclose(stacked(F, parameters), P_ref)
+    assert np.allclose(P, P_ref)
+    assert np.allclose(A, A_ref)
+
+    assert cubrium.constitution.vectorize(cubrium.jit.umat_svk) is cubrium.jit.umat_svk
+    assert np.allclose(
+        cubrium.constitution.gradient(umat, F[0, 0], parameters),
+        cubrium.constitution.gradient(
+            cubrium.constitution.umat_svk, F[0, 0], parameters
+        ),
+    )
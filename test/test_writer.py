@@ -0,0 +1,135 @@
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import h5py
+
+import pytest
+
+import cubrium
+
+from conftest import model
+
+
+def test_stream(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    MDL = model()
+
+    with cubrium.writer.Stream("uniaxial", MDL, chunks=4) as stream:
+        Res = cubrium.solve(MDL)(
+            x0=np.zeros(9), lpf0=0.0, maxsteps=10, callback=stream, verbose=False
+        )
+
+    Y = np.array([res.x for res in Res])
+    history = cubrium.recover(Y, MDL, columnar=True)
+
+    with h5py.File("uniaxial.h5", "r") as f:
+        assert f["cube/Displacement"].shape == (11, 8, 3)
+        assert np.allclose(
+            f["cube/Load-Proportionality-Factor (LPF)"][:, 0, 0], history.lpf
+        )
+        assert np.allclose(f["cube/Cauchy Stress"][:, 0, 0], history.cauchy[:, 0, 0])
+        assert np.allclose(
+            f["points/Reaction Force"][:, 3], history.force.components[..., 0]
+        )
+
+    for mesh in ["cube", "points"]:
+        root = ET.parse("uniaxial_" + mesh + ".xdmf").getroot()
+        assert len(root.findall("./Domain/Grid/Grid")) == 11
+
+
+def test_stream_failure(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    MDL = model()
+
+    class Abort(Exception):
+        pass
+
+    def callback(res):
+        stream(res)
+        if stream.nsteps == 6:
+            raise Abort
+
+    # the files are valid after a failure in the middle of the path
+    with pytest.raises(Abort):
+        with cubrium.writer.Stream("uniaxial", MDL, chunks=4) as stream:
+            cubrium.solve(MDL)(
+                x0=np.zeros(9), lpf0=0.0, maxsteps=10, callback=callback, verbose=False
+            )
+
+    with h5py.File("uniaxial.h5", "r") as f:
+        assert f["points/Traction"].shape == (6, 6, 3)
+
+    root = ET.parse("uniaxial_points.xdmf").getroot()
+    assert len(root.findall("./Domain/Grid/Grid")) == 6
+
+
+@pytest.mark.parametrize("dtype", [None, np.float32])
+def test_hdf5(tmp_path, monkeypatch, dtype):
+    monkeypatch.chdir(tmp_path)
+    MDL = model()
+
+    with cubrium.writer.Stream("stream", MDL) as stream:
+        Res = cubrium.solve(MDL)(
+            x0=np.zeros(9), lpf0=0.0, maxsteps=10, callback=stream, verbose=False
+        )
+
+    Y = np.array([res.x for res in Res])
+    history = cubrium.recover(Y, MDL, columnar=True)
+
+    cubrium.writer.hdf5(history, "all", dtype=dtype)
+    cubrium.writer.hdf5(history, "selected", fields=["Cauchy Stress"], dtype=dtype)
+
+    with h5py.File("stream.h5", "r") as f, h5py.File("all.h5", "r") as g:
+        for mesh in ["cube", "points"]:
+            for name, value in f[mesh].items():
+                if name in ["geometry", "topology"]:
+                    continue
+                assert g[mesh][name].dtype == (value.dtype if dtype is None else dtype)
+                assert np.allclose(g[mesh][name], value, rtol=1e-6)
+
+    with h5py.File("selected.h5", "r") as f:
+        assert list(f["cube"]) == ["Cauchy Stress", "geometry", "topology"]
+        assert list(f["points"]) == ["geometry", "topology"]
+
+    root = ET.parse("all_points.xdmf").getroot()
+    assert len(root.findall("./Domain/Grid/Grid")) == 11
+
+    assert (tmp_path / "selected_cube.xdmf").exists()
+    assert not (tmp_path / "selected_points.xdmf").exists()
+
+
+def test_xdmf(tmp_path, monkeypatch):
+    meshio = pytest.importorskip("meshio")
+    monkeypatch.chdir(tmp_path)
+    MDL = model()
+
+    Res = cubrium.solve(MDL)(x0=np.zeros(9), lpf0=0.0, maxsteps=5, verbose=False)
+    history = cubrium.recover(np.array([res.x for res in Res]), MDL, columnar=True)
+
+    # the files of concurrent writers are stored in their directories
+    for name in ["a", "b"]:
+        (tmp_path / name).mkdir()
+
+    with ThreadPoolExecutor(2) as pool:
+        for future in [
+            pool.submit(cubrium.writer.xdmf, history, str(tmp_path / name / "run"))
+            for name in ["a", "b"]
+        ]:
+            future.result()
+
+    for name in ["a", "b"]:
+        for mesh in ["cube", "points"]:
+            assert (tmp_path / name / ("run_" + mesh + ".xdmf")).exists()
+            assert (tmp_path / name / ("run_" + mesh + ".h5")).exists()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "b"]
+
+    # the XDMF files refer to the HDF5 files in their directory
+    with meshio.xdmf.TimeSeriesReader(str(tmp_path / "a" / "run_cube.xdmf")) as reader:
+        reader.read_points_cells()
+        assert reader.num_steps == len(Res)
+        t, point_data, cell_data = reader.read_data(reader.num_steps - 1)
+
+    lpf = cell_data["Load-Proportionality-Factor (LPF)"][0]
+    assert np.allclose(lpf, history.lpf[-1])